@@ -2,7 +2,9 @@
 Main application entry point for the Sleep Science Explainer Bot.
 """
 
+import asyncio
 import os
+from importlib.util import find_spec
 import logging
 from contextlib import asynccontextmanager
 from typing import List
@@ -11,37 +13,85 @@ import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
 
+from backend.api.responses import INTERNAL_ERROR_BODY, json_bytes_response
 from backend.api.routes import analytics, chat, health, papers, monitoring
 from backend.core.config import settings
 from backend.core.logging import get_logger, setup_logging
-from backend.core.middleware import RequestLoggingMiddleware
+from backend.core.middleware import HealthProbeMiddleware, RequestLoggingMiddleware
 from backend.database.connection import db_manager
+from backend.models.analytics import get_analytics_service
 
 # Setup logging
 setup_logging()
 logger = get_logger(__name__)
 
+API_PREFIX = settings.api_prefix
+
+# uvloop and the C httptools parser are markedly faster than the pure
+# Python defaults; fall back to those only where they can't be installed
+UVICORN_LOOP = "uvloop" if find_spec("uvloop") else "asyncio"
+UVICORN_HTTP = "httptools" if find_spec("httptools") else "h11"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     logger.info("Starting Sleep Science Explainer Bot...")
-    logger.info(f"Environment: {settings.environment}")
-    logger.info(f"Debug mode: {'on' if settings.debug else 'off'}")
+    logger.info("Environment", environment=settings.environment)
+    logger.info("Debug mode", debug=settings.debug)
     
     # Connect to database
     db_manager.create_tables()
     
+    # Warm up the async pool, which serves every request, so the first
+    # requests don't pay connect latency. Best-effort: a failed ping is
+    # logged and the connection is opened on demand instead.
+    results = await asyncio.gather(*[
+        db_manager.async_ping()
+        for _ in range(settings.database_pool_size)
+    ], return_exceptions=True)
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logger.warning(
+            "Connection pool warm-up incomplete",
+            failed=len(failures),
+            attempted=len(results),
+            error=str(failures[0])
+        )
+    
     yield
     
-    # Close database connections
+    # Write buffered analytics before the pools go away. The service and
+    # chat bot are created on first use; skip whichever never was.
+    if get_analytics_service.cache_info().currsize:
+        await get_analytics_service().close()
+    
+    # Close database connections and pooled upstream clients
     db_manager.close()
+    await db_manager.async_close()
+    await papers.nih_client.aclose()
+    if chat.get_chat_bot.cache_info().currsize:
+        await chat.get_chat_bot().aclose()
     logger.info("Sleep Science Explainer Bot shut down.")
 
 
+def create_health_app() -> FastAPI:
+    """Create the minimal sub-application serving health and readiness probes."""
+    
+    health_app = FastAPI(
+        docs_url=None,
+        redoc_url=None,
+        openapi_url=None,
+        default_response_class=ORJSONResponse
+    )
+    health_app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+    health_app.include_router(health.router, tags=["Health"])
+    
+    return health_app
+
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     
@@ -49,36 +99,31 @@ def create_app() -> FastAPI:
         title=settings.app_name,
         version=settings.app_version,
         debug=settings.debug,
-        openapi_url=f"{settings.api_prefix}/openapi.json",
-        docs_url=f"{settings.api_prefix}/docs",
-        redoc_url=f"{settings.api_prefix}/redoc",
+        openapi_url=f"{API_PREFIX}/openapi.json",
+        docs_url=f"{API_PREFIX}/docs",
+        redoc_url=f"{API_PREFIX}/redoc",
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
     
-    # Add middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.cors_origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-    
-    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+    health_app = None
     
-    # Import routes after middleware setup
+    # Import routes and add middleware. Starlette runs the last-added
+    # middleware outermost, so the inner layers are registered first.
     try:
         from backend.core.middleware import RateLimitMiddleware
         
-        app.add_middleware(RequestLoggingMiddleware)
         app.add_middleware(RateLimitMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
         
         # Include routers
-        app.include_router(health.router, tags=["Health"])
-        app.include_router(chat.router, prefix=settings.api_prefix, tags=["Chat"])
-        app.include_router(papers.router, prefix=settings.api_prefix, tags=["Papers"])
-        app.include_router(analytics.router, prefix=settings.api_prefix, tags=["Analytics"])
-        app.include_router(monitoring.router, prefix=settings.api_prefix, tags=["Monitoring"])
+        app.include_router(chat.router, prefix=API_PREFIX, tags=["Chat"])
+        app.include_router(papers.router, prefix=API_PREFIX, tags=["Papers"])
+        app.include_router(analytics.router, prefix=API_PREFIX, tags=["Analytics"])
+        app.include_router(monitoring.router, prefix=API_PREFIX, tags=["Monitoring"])
+        
+        # Health probes get a minimal sub-app of their own
+        health_app = create_health_app()
         
     except ImportError as e:
         logger.warning(f"Some routes could not be loaded: {e}")
@@ -87,14 +132,27 @@ def create_app() -> FastAPI:
         async def health_check():
             return {"status": "healthy", "message": "Basic health check"}
     
+    # Host validation and CORS preflight short-circuit before logging and
+    # rate limiting ever see the request
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Health probes are answered by their own sub-app in front of every
+    # other middleware, so they skip CORS, logging and rate limiting
+    if health_app is not None:
+        app.add_middleware(HealthProbeMiddleware, probe_app=health_app)
+    
     # Global exception handler
     @app.exception_handler(Exception)
     async def global_exception_handler(request, exc):
-        logger.error(f"Unhandled exception: {exc}", exc_info=True)
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"}
-        )
+        logger.error("Unhandled exception", error=str(exc), exc_info=exc)
+        return json_bytes_response(INTERNAL_ERROR_BODY, status_code=500)
     
     return app
 
@@ -102,11 +160,21 @@ def create_app() -> FastAPI:
 app = create_app()
 
 
-if __name__ == "__main__":
+def run_server() -> None:
+    """Serve the application with uvicorn in the current interpreter."""
+    multi_process = not settings.debug
     uvicorn.run(
         "app:app",
         host=settings.api_host,
         port=settings.api_port,
+        loop=UVICORN_LOOP,
+        http=UVICORN_HTTP,
+        workers=(os.cpu_count() or 1) * 2 + 1 if multi_process else 1,
         reload=settings.debug,
-        log_level=settings.log_level.lower()
-    ) 
\ No newline at end of file
+        log_level=settings.log_level.lower(),
+        access_log=False  # RequestLoggingMiddleware already logs each request
+    )
+
+
+if __name__ == "__main__":
+    run_server() 
\ No newline at end of file
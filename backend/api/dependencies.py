@@ -0,0 +1,13 @@
+"""
+Shared FastAPI dependencies for the Sleep Science Explainer Bot.
+"""
+
+from datetime import datetime
+
+from fastapi import Request
+
+
+def get_now(request: Request) -> datetime:
+    """Return the request start time captured by RequestLoggingMiddleware."""
+    now = getattr(request.state, "now", None)
+    return now if now is not None else datetime.utcnow()
@@ -0,0 +1,59 @@
+"""
+Pre-serialized JSON responses for the Sleep Science Explainer Bot.
+"""
+
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+# Constant error payloads, serialized once at import
+INTERNAL_ERROR_BODY = orjson.dumps({"detail": "Internal server error"})
+USER_NOT_FOUND_BODY = orjson.dumps({"detail": "User not found"})
+CONVERSATION_NOT_FOUND_BODY = orjson.dumps({"detail": "Conversation not found"})
+
+
+def json_bytes_response(body: bytes, status_code: int = 200) -> Response:
+    """
+    Wrap already-serialized JSON bytes in a response.
+    
+    A fresh Response is built per call because middleware may mutate
+    response headers in place.
+    """
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+# Exact-type encoders, checked with one dict lookup before any isinstance
+_TYPE_ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    Decimal: float,
+    set: list,
+    frozenset: list,
+}
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively."""
+    encoder = _TYPE_ENCODERS.get(type(obj))
+    if encoder is not None:
+        return encoder(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONModelResponse(JSONResponse):
+    """
+    JSON response rendered directly with orjson.
+    
+    Pydantic models inside the content are dumped by orjson's default hook,
+    so handlers can return them without FastAPI's jsonable_encoder pass.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        )
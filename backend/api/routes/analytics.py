@@ -2,21 +2,56 @@
 Analytics endpoints for the Sleep Science Explainer Bot.
 """
 
+import csv
+import io
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import func, distinct
+from sqlalchemy import bindparam, distinct, func, select
 
+from backend.api.responses import (
+    CONVERSATION_NOT_FOUND_BODY,
+    USER_NOT_FOUND_BODY,
+    json_bytes_response,
+)
+from backend.core.cache import ttl_cache
 from backend.core.logging import get_logger
 from backend.database.connection import db_manager
 from backend.database.models import Interaction, User
-from backend.models.analytics import AnalyticsService
+from backend.models.analytics import AnalyticsService, get_analytics_service
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Interaction columns included in exports and rows fetched per DB round trip
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "conversation_id",
+    "topic",
+    "message_length",
+    "response_length",
+    "timestamp",
+)
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "json": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Overview aggregates, built once so requests only bind and execute.
+# Since user_id is not fully implemented in the Interaction model yet,
+# unique conversations serve as a proxy for users for now.
+OVERVIEW_STMT = select(
+    func.count(Interaction.id),
+    func.count(distinct(Interaction.conversation_id)),
+    func.avg(Interaction.message_length)
+).where(Interaction.timestamp.between(bindparam("start_date"), bindparam("end_date")))
+
 
 class AnalyticsOverview(BaseModel):
     """Analytics overview model."""
@@ -50,11 +85,8 @@ class UserAnalytics(BaseModel):
     session_duration: float
 
 
-# Initialize analytics service
-analytics_service = AnalyticsService()
-
-
 @router.get("/analytics/overview", response_model=AnalyticsOverview)
+@ttl_cache(ttl=60)
 async def get_analytics_overview(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze")
 ) -> AnalyticsOverview:
@@ -69,21 +101,17 @@ async def get_analytics_overview(
     """
     logger.info("Analytics overview requested", days=days)
     
-    db_session = db_manager.get_session()
     try:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
 
-        # Base query for the time period
-        query = db_session.query(Interaction).filter(Interaction.timestamp.between(start_date, end_date))
-
-        total_interactions = query.count()
-        
-        # Since user_id is not fully implemented in the Interaction model yet,
-        # we'll count unique conversations as a proxy for users for now.
-        unique_users = query.with_entities(func.count(distinct(Interaction.conversation_id))).scalar()
-        
-        avg_message_length = query.with_entities(func.avg(Interaction.message_length)).scalar()
+        # Compute all aggregates for the time period in a single round trip
+        async with db_manager.async_session() as db_session:
+            result = await db_session.execute(
+                OVERVIEW_STMT,
+                {"start_date": start_date, "end_date": end_date}
+            )
+            total_interactions, unique_users, avg_message_length = result.one()
 
         # Since topic is hardcoded, we'll create a placeholder for top_topics
         top_topics = []
@@ -106,14 +134,13 @@ async def get_analytics_overview(
             status_code=500,
             detail="Failed to retrieve analytics overview"
         )
-    finally:
-        db_session.close()
 
 
 @router.get("/analytics/topics", response_model=List[TopicAnalytics])
 async def get_topic_analytics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    limit: int = Query(10, ge=1, le=50, description="Maximum number of topics")
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of topics"),
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> List[TopicAnalytics]:
     """
     Get analytics for popular topics.
@@ -158,7 +185,10 @@ async def get_topic_analytics(
 
 
 @router.get("/analytics/users/{user_id}", response_model=UserAnalytics)
-async def get_user_analytics(user_id: str) -> UserAnalytics:
+async def get_user_analytics(
+    user_id: str,
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> UserAnalytics:
     """
     Get analytics for a specific user.
     
@@ -174,10 +204,7 @@ async def get_user_analytics(user_id: str) -> UserAnalytics:
         user_stats = await analytics_service.get_user_analytics(user_id)
         
         if "error" in user_stats:
-            raise HTTPException(
-                status_code=404,
-                detail="User not found"
-            )
+            return json_bytes_response(USER_NOT_FOUND_BODY, status_code=404)
         
         return UserAnalytics(
             user_id=user_stats["user_id"],
@@ -202,7 +229,10 @@ async def get_user_analytics(user_id: str) -> UserAnalytics:
 
 
 @router.get("/analytics/conversations/{conversation_id}")
-async def get_conversation_analytics(conversation_id: str) -> Dict[str, Any]:
+async def get_conversation_analytics(
+    conversation_id: str,
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> Dict[str, Any]:
     """
     Get analytics for a specific conversation.
     
@@ -218,10 +248,7 @@ async def get_conversation_analytics(conversation_id: str) -> Dict[str, Any]:
         conversation_stats = await analytics_service.get_conversation_analytics(conversation_id)
         
         if "error" in conversation_stats:
-            raise HTTPException(
-                status_code=404,
-                detail="Conversation not found"
-            )
+            return json_bytes_response(CONVERSATION_NOT_FOUND_BODY, status_code=404)
         
         return conversation_stats
         
@@ -240,6 +267,7 @@ async def get_conversation_analytics(conversation_id: str) -> Dict[str, Any]:
 
 
 @router.get("/analytics/trends")
+@ttl_cache(ttl=300)
 async def get_usage_trends(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     interval: str = Query("daily", description="Time interval (daily, weekly, monthly)")
@@ -259,12 +287,13 @@ async def get_usage_trends(
     try:
         # TODO: Implement actual trend calculation
         # For now, return placeholder data
+        today = datetime.utcnow().date()
         trends = {
             "period_days": days,
             "interval": interval,
             "data": [
                 {
-                    "date": (datetime.utcnow() - timedelta(days=i)).strftime("%Y-%m-%d"),
+                    "date": (today - timedelta(days=i)).isoformat(),
                     "interactions": 0,
                     "users": 0
                 }
@@ -284,7 +313,8 @@ async def get_usage_trends(
 
 @router.post("/analytics/cleanup")
 async def cleanup_analytics_data(
-    days: int = Query(90, ge=1, le=365, description="Number of days to keep data for")
+    days: int = Query(90, ge=1, le=365, description="Number of days to keep data for"),
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> Dict[str, str]:
     """
     Clean up old analytics data.
@@ -312,42 +342,97 @@ async def cleanup_analytics_data(
         )
 
 
+async def _iter_interaction_chunks(start_date: datetime) -> AsyncIterator[List[Any]]:
+    """
+    Yield interaction rows newer than start_date, EXPORT_CHUNK_SIZE at a time.
+    
+    The session lives inside the generator, so its pooled connection goes
+    back as soon as the stream finishes, fails or is closed early.
+    
+    Args:
+        start_date: Earliest interaction timestamp to export
+        
+    Yields:
+        Lists of interaction rows restricted to EXPORT_COLUMNS
+    """
+    try:
+        async with db_manager.async_session() as db_session:
+            result = await db_session.stream(
+                select(*[getattr(Interaction, column) for column in EXPORT_COLUMNS])
+                .where(Interaction.timestamp >= start_date)
+                .order_by(Interaction.timestamp)
+                .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+            )
+            async for rows in result.partitions():
+                yield rows
+    except Exception as e:
+        logger.error("Error streaming analytics export", error=str(e))
+        raise
+
+
+async def _iter_ndjson(chunks: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    """Encode row chunks as newline-delimited JSON."""
+    try:
+        async for chunk in chunks:
+            yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in chunk)
+    finally:
+        await chunks.aclose()
+
+
+async def _iter_csv(chunks: AsyncIterator[List[Any]]) -> AsyncIterator[str]:
+    """Encode row chunks as CSV with a header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    
+    try:
+        async for chunk in chunks:
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    finally:
+        await chunks.aclose()
+    
+    # Header only, when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
 @router.get("/analytics/export")
 async def export_analytics_data(
     format: str = Query("json", description="Export format (json, csv)"),
     days: int = Query(30, ge=1, le=365, description="Number of days to export")
-) -> Dict[str, Any]:
+) -> StreamingResponse:
     """
     Export analytics data.
     
+    Rows are streamed as newline-delimited JSON or CSV so memory use stays
+    bounded by the chunk size rather than the size of the export.
+    
     Args:
         format: Export format
         days: Number of days to export
         
     Returns:
-        Exported analytics data
+        Streaming response with the exported interactions
     """
     logger.info("Analytics export requested", format=format, days=days)
     
-    try:
-        # TODO: Implement actual data export
-        # For now, return placeholder
-        export_data = {
-            "format": format,
-            "period_days": days,
-            "exported_at": datetime.utcnow(),
-            "data": {
-                "interactions": [],
-                "users": [],
-                "topics": []
-            }
-        }
-        
-        return export_data
-        
-    except Exception as e:
-        logger.error("Error exporting analytics data", error=str(e))
+    format = format.lower()
+    if format not in EXPORT_MEDIA_TYPES:
         raise HTTPException(
-            status_code=500,
-            detail="Failed to export analytics data"
-        ) 
\ No newline at end of file
+            status_code=400,
+            detail="Unsupported export format"
+        )
+    
+    start_date = datetime.utcnow() - timedelta(days=days)
+    chunks = _iter_interaction_chunks(start_date)
+    body = _iter_csv(chunks) if format == "csv" else _iter_ndjson(chunks)
+    filename = f"analytics_export_{days}d.{'csv' if format == 'csv' else 'ndjson'}"
+    
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    ) 
\ No newline at end of file
@@ -3,17 +3,23 @@ Chat endpoints for the Sleep Science Explainer Bot.
 """
 
 from datetime import datetime
+from functools import lru_cache
+from time import perf_counter
 from typing import List, Optional, Dict, Any
-import uuid
 
+import orjson
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
+from backend.api.responses import CONVERSATION_NOT_FOUND_BODY, json_bytes_response
+from backend.core.ids import new_id
 from backend.core.logging import get_logger
 from backend.core.config import settings
+from backend.models.analytics import AnalyticsService, get_analytics_service
 from backend.models.chat import ChatBot
-from backend.database.connection import db_manager
-from backend.database.models import Interaction, Conversation, User
+from backend.database.connection import UPSERT_INSERTS, db_manager
+from backend.database.models import Conversation, User
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -51,19 +57,43 @@ class ConversationHistory(BaseModel):
     updated_at: datetime
 
 
-# Initialize services (these will be properly initialized later)
-chat_bot = ChatBot()
+# Sleep science topics the bot can discuss, serialized once at import
+AVAILABLE_TOPICS_BODY = orjson.dumps({
+    "topics": [
+        "sleep_cycles",
+        "sleep_disorders",
+        "sleep_hygiene",
+        "sleep_research",
+        "sleep_medicine",
+        "sleep_apnea",
+        "insomnia",
+        "circadian_rhythms",
+        "sleep_quality",
+        "sleep_duration",
+        "sleep_environment",
+        "sleep_and_health"
+    ]
+})
+
+@lru_cache(maxsize=1)
+def get_chat_bot() -> ChatBot:
+    """Return the shared chat bot, creating it on first use."""
+    return ChatBot()
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_bot(request: ChatRequest) -> ChatResponse:
+async def chat_with_bot(
+    request: ChatRequest,
+    chat_bot: ChatBot = Depends(get_chat_bot),
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> ChatResponse:
     """
     Main chat endpoint for interacting with the Sleep Science Explainer Bot.
     
     This endpoint processes user messages and returns AI-generated responses
     about sleep science topics, research papers, and health guidelines.
     """
-    conversation_id = request.conversation_id or str(uuid.uuid4())
+    conversation_id = request.conversation_id or new_id()
     user_id = request.user_id or "anonymous-user"
 
     logger.info(
@@ -73,55 +103,49 @@ async def chat_with_bot(request: ChatRequest) -> ChatResponse:
         message_length=len(request.message)
     )
     
-    db_session = db_manager.get_session()
     try:
-        # Ensure user exists
-        user = db_session.query(User).filter_by(id=user_id).first()
-        if not user:
-            user = User(id=user_id)
-            db_session.add(user)
-            db_session.commit()
-
-        # Ensure conversation exists
-        conversation = db_session.query(Conversation).filter_by(id=conversation_id).first()
-        if not conversation:
-            conversation = Conversation(id=conversation_id, user_id=user_id)
-            db_session.add(conversation)
-            db_session.commit()
-
-        # Generate response using the chat bot
-        start_time = datetime.utcnow()
+        async with db_manager.async_session() as db_session:
+            # Ensure user and conversation exist, without reading them first
+            upsert = UPSERT_INSERTS[db_session.bind.dialect.name]
+            await db_session.execute(
+                upsert(User).values(id=user_id)
+                .on_conflict_do_nothing(index_elements=[User.id])
+            )
+            await db_session.execute(
+                upsert(Conversation).values(id=conversation_id, user_id=user_id)
+                .on_conflict_do_nothing(index_elements=[Conversation.id])
+            )
+        
+        # Generate response using the chat bot, with the connection back
+        # in the pool for the duration of the model call
+        start_time = perf_counter()
         response_data = await chat_bot.generate_response(
             message=request.message,
             conversation_id=conversation_id,
             context=request.context
         )
+        processing_time = perf_counter() - start_time
         end_time = datetime.utcnow()
-        processing_time = (end_time - start_time).total_seconds()
         
-        # Log analytics interaction
-        interaction = Interaction(
+        # Log analytics interaction and update the conversation summary
+        await analytics_service.log_interaction(
+            user_id=user_id,
             conversation_id=conversation_id,
             message=request.message,
             response=response_data["response"],
-            message_length=len(request.message),
-            response_length=len(response_data["response"]),
-            additional_data={"processing_time_seconds": processing_time},
-            topic="sleep_science"  # Placeholder topic
+            topic="sleep_science",  # Placeholder topic
+            additional_data={"processing_time_seconds": processing_time}
         )
-        db_session.add(interaction)
-        db_session.commit()
         
         return ChatResponse(
             response=response_data["response"],
             conversation_id=conversation_id,
-            timestamp=datetime.utcnow(),
+            timestamp=end_time,
             sources=response_data.get("sources"),
             confidence=response_data.get("confidence")
         )
         
     except Exception as e:
-        db_session.rollback()
         logger.error(
             "Error generating chat response",
             error=str(e),
@@ -131,12 +155,13 @@ async def chat_with_bot(request: ChatRequest) -> ChatResponse:
             status_code=500,
             detail="Failed to generate response. Please try again."
         )
-    finally:
-        db_session.close()
 
 
 @router.get("/chat/conversation/{conversation_id}", response_model=ConversationHistory)
-async def get_conversation_history(conversation_id: str) -> ConversationHistory:
+async def get_conversation_history(
+    conversation_id: str,
+    chat_bot: ChatBot = Depends(get_chat_bot)
+) -> ConversationHistory:
     """
     Retrieve conversation history for a specific conversation ID.
     """
@@ -151,14 +176,14 @@ async def get_conversation_history(conversation_id: str) -> ConversationHistory:
             error=str(e),
             conversation_id=conversation_id
         )
-        raise HTTPException(
-            status_code=404,
-            detail="Conversation not found"
-        )
+        return json_bytes_response(CONVERSATION_NOT_FOUND_BODY, status_code=404)
 
 
 @router.delete("/chat/conversation/{conversation_id}")
-async def delete_conversation(conversation_id: str) -> Dict[str, str]:
+async def delete_conversation(
+    conversation_id: str,
+    chat_bot: ChatBot = Depends(get_chat_bot)
+) -> Dict[str, str]:
     """
     Delete a conversation and its history.
     """
@@ -180,25 +205,10 @@ async def delete_conversation(conversation_id: str) -> Dict[str, str]:
 
 
 @router.get("/chat/topics")
-async def get_available_topics() -> Dict[str, List[str]]:
+async def get_available_topics() -> Response:
     """
     Get available sleep science topics that the bot can discuss.
     """
     logger.info("Retrieving available topics")
     
-    topics = [
-        "sleep_cycles",
-        "sleep_disorders",
-        "sleep_hygiene",
-        "sleep_research",
-        "sleep_medicine",
-        "sleep_apnea",
-        "insomnia",
-        "circadian_rhythms",
-        "sleep_quality",
-        "sleep_duration",
-        "sleep_environment",
-        "sleep_and_health"
-    ]
-    
-    return {"topics": topics} 
\ No newline at end of file
+    return json_bytes_response(AVAILABLE_TOPICS_BODY) 
\ No newline at end of file
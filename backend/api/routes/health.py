@@ -3,20 +3,31 @@ Health check endpoints for the Sleep Science Explainer Bot.
 """
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, TypedDict
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 
+from backend.api.dependencies import get_now
+from backend.api.responses import json_bytes_response
 from backend.core.config import settings
 from backend.core.logging import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Settings read on every probe, bound once at import
+APP_VERSION = settings.app_version
+ENVIRONMENT = settings.environment
 
-class HealthResponse(BaseModel):
-    """Health check response model."""
+# Static readiness payload, serialized once at import
+READY_BODY = orjson.dumps({"status": "ready"})
+
+
+class HealthResponse(TypedDict):
+    """Health check response payload."""
     status: str
     timestamp: datetime
     version: str
@@ -34,22 +45,23 @@ class DetailedHealthResponse(BaseModel):
     services: Dict[str, Any]
 
 
-@router.get("/health", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
+@router.get("/health")
+async def health_check(now: datetime = Depends(get_now)) -> ORJSONResponse:
     """Basic health check endpoint."""
     logger.debug("Health check requested")
     
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.utcnow(),
-        version=settings.app_version,
-        environment=settings.environment,
-        uptime=0.0  # TODO: Implement actual uptime tracking
-    )
+    payload: HealthResponse = {
+        "status": "healthy",
+        "timestamp": now,
+        "version": APP_VERSION,
+        "environment": ENVIRONMENT,
+        "uptime": 0.0  # TODO: Implement actual uptime tracking
+    }
+    return ORJSONResponse(payload)
 
 
 @router.get("/health/detailed", response_model=DetailedHealthResponse)
-async def detailed_health_check() -> DetailedHealthResponse:
+async def detailed_health_check(now: datetime = Depends(get_now)) -> DetailedHealthResponse:
     """Detailed health check with service status."""
     logger.debug("Detailed health check requested")
     
@@ -72,19 +84,19 @@ async def detailed_health_check() -> DetailedHealthResponse:
     
     return DetailedHealthResponse(
         status=overall_status,
-        timestamp=datetime.utcnow(),
-        version=settings.app_version,
-        environment=settings.environment,
+        timestamp=now,
+        version=APP_VERSION,
+        environment=ENVIRONMENT,
         uptime=0.0,  # TODO: Implement actual uptime tracking
         services=services
     )
 
 
 @router.get("/ready")
-async def readiness_check() -> Dict[str, str]:
+async def readiness_check() -> Response:
     """Readiness check for Kubernetes deployments."""
     logger.debug("Readiness check requested")
     
     # TODO: Implement actual readiness checks
     # For now, always return ready
-    return {"status": "ready"} 
\ No newline at end of file
+    return json_bytes_response(READY_BODY) 
\ No newline at end of file
@@ -2,16 +2,24 @@
 Monitoring and logging dashboard endpoints.
 """
 
+import asyncio
+import gzip
+import hashlib
+from collections import deque
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
-import json
 import os
-from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import HTMLResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.api.dependencies import get_now
+from backend.api.responses import json_bytes_response
+from backend.core.cache import TTLCache
 from backend.core.config import settings
 from backend.core.logging import get_logger
 from backend.database.connection import db_manager
@@ -19,6 +27,23 @@ from backend.database.connection import db_manager
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Planner row estimates are O(1) to read, unlike COUNT(*) scans, and are
+# cached briefly since the dashboard polls them
+TABLE_COUNTS_TTL_SECONDS = 15.0
+COUNTED_TABLES = ("users", "interactions")
+APPROXIMATE_COUNTS_SQL = text(
+    "SELECT relname, reltuples::bigint FROM pg_class WHERE relname IN :tables"
+).bindparams(bindparam("tables", expanding=True))
+# Fallback for databases without pg_class: exact counts, still one round trip
+EXACT_COUNTS_SQL = text(
+    "SELECT (SELECT COUNT(*) FROM users) AS users, "
+    "(SELECT COUNT(*) FROM interactions) AS interactions"
+)
+table_counts_cache = TTLCache(ttl=TABLE_COUNTS_TTL_SECONDS, maxsize=1)
+
+# Only the end of the log file is read, so tail latency doesn't grow with it
+LOG_TAIL_BYTES = 64 * 1024
+
 
 class SystemMetrics(BaseModel):
     """System metrics model."""
@@ -41,44 +66,101 @@ class LogEntry(BaseModel):
     line_number: int
 
 
-@router.get("/monitoring/dashboard", response_class=HTMLResponse)
-async def monitoring_dashboard():
-    """Simple HTML dashboard for monitoring."""
-    html_content = """
+# Dashboard stylesheet and script, served as separate long-lived assets.
+# Each is gzipped once at import; the page references them by content hash
+# so a changed asset gets a new URL and the immutable cache never goes stale.
+DASHBOARD_CSS_BYTES = """
+body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
+.container { max-width: 1200px; margin: 0 auto; }
+.header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px; margin-bottom: 20px; }
+.metrics-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 20px; margin-bottom: 30px; }
+.metric-card { background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+.metric-value { font-size: 2em; font-weight: bold; color: #667eea; }
+.metric-label { color: #666; margin-top: 5px; }
+.section { background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin-bottom: 20px; }
+.log-entry { padding: 10px; border-bottom: 1px solid #eee; }
+.log-error { background-color: #ffebee; }
+.log-warning { background-color: #fff3e0; }
+.log-info { background-color: #e3f2fd; }
+.refresh-btn { background: #667eea; color: white; border: none; padding: 10px 20px; border-radius: 5px; cursor: pointer; margin-bottom: 20px; }
+.refresh-btn:hover { background: #5a6fd8; }
+""".encode("utf-8")
+
+DASHBOARD_JS_BYTES = """
+function refreshData() {
+    location.reload();
+}
+
+function autoRefresh() {
+    setTimeout(refreshData, 30000); // Refresh every 30 seconds
+}
+
+// Auto-refresh on page load
+window.onload = function() {
+    autoRefresh();
+};
+
+// Fetch and display metrics
+fetch('/api/v1/monitoring/metrics')
+    .then(response => response.json())
+    .then(data => {
+        document.getElementById('uptime').textContent = Math.floor(data.uptime_seconds / 3600) + 'h ' + Math.floor((data.uptime_seconds % 3600) / 60) + 'm';
+        document.getElementById('requests').textContent = data.total_requests.toLocaleString();
+        document.getElementById('users').textContent = data.active_users;
+        document.getElementById('interactions').textContent = data.total_interactions || '--';
+    })
+    .catch(error => {
+        console.error('Error fetching metrics:', error);
+    });
+
+// Fetch and display analytics
+fetch('/api/v1/analytics/overview?days=1')
+    .then(response => response.json())
+    .then(data => {
+        const analyticsHtml = `
+            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px;">
+                <div><strong>Total Interactions:</strong> ${data.total_interactions}</div>
+                <div><strong>Unique Users:</strong> ${data.unique_users}</div>
+                <div><strong>Avg Message Length:</strong> ${data.avg_message_length || 'N/A'}</div>
+                <div><strong>Popular Topics:</strong> ${data.popular_topics ? data.popular_topics.slice(0, 3).join(', ') : 'N/A'}</div>
+            </div>
+        `;
+        document.getElementById('analytics-data').innerHTML = analyticsHtml;
+    })
+    .catch(error => {
+        document.getElementById('analytics-data').innerHTML = '<p style="color: #666;">Analytics data unavailable</p>';
+    });
+
+// Fetch and display logs
+fetch('/api/v1/monitoring/logs?limit=10')
+    .then(response => response.json())
+    .then(data => {
+        const logsHtml = data.logs.map(log => `
+            <div class="log-entry log-${log.level.toLowerCase()}">
+                <strong>${new Date(log.timestamp).toLocaleString()}</strong> [${log.level}] 
+                ${log.message} <em>(${log.module}:${log.line_number})</em>
+            </div>
+        `).join('');
+        document.getElementById('logs-data').innerHTML = logsHtml || '<p>No recent logs</p>';
+    })
+    .catch(error => {
+        document.getElementById('logs-data').innerHTML = '<p style="color: #666;">Logs unavailable</p>';
+    });
+""".encode("utf-8")
+
+DASHBOARD_CSS_GZIP = gzip.compress(DASHBOARD_CSS_BYTES)
+DASHBOARD_JS_GZIP = gzip.compress(DASHBOARD_JS_BYTES)
+STATIC_ASSET_CACHE_CONTROL = "public, max-age=86400, immutable"
+
+# Dashboard page, encoded once at import. Metrics are fetched by the page's
+# own scripts, so the markup itself is static and browser-cacheable.
+DASHBOARD_HTML_BYTES = """
     <!DOCTYPE html>
     <html>
     <head>
         <title>Sleep Science Bot - Monitoring Dashboard</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
-            .container { max-width: 1200px; margin: 0 auto; }
-            .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px; margin-bottom: 20px; }
-            .metrics-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 20px; margin-bottom: 30px; }
-            .metric-card { background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-            .metric-value { font-size: 2em; font-weight: bold; color: #667eea; }
-            .metric-label { color: #666; margin-top: 5px; }
-            .section { background: white; padding: 20px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin-bottom: 20px; }
-            .log-entry { padding: 10px; border-bottom: 1px solid #eee; }
-            .log-error { background-color: #ffebee; }
-            .log-warning { background-color: #fff3e0; }
-            .log-info { background-color: #e3f2fd; }
-            .refresh-btn { background: #667eea; color: white; border: none; padding: 10px 20px; border-radius: 5px; cursor: pointer; margin-bottom: 20px; }
-            .refresh-btn:hover { background: #5a6fd8; }
-        </style>
-        <script>
-            function refreshData() {
-                location.reload();
-            }
-            
-            function autoRefresh() {
-                setTimeout(refreshData, 30000); // Refresh every 30 seconds
-            }
-            
-            // Auto-refresh on page load
-            window.onload = function() {
-                autoRefresh();
-            };
-        </script>
+        <link rel="stylesheet" href="/api/v1/monitoring/dashboard.css?v={css_version}">
+        <script src="/api/v1/monitoring/dashboard.js?v={js_version}" defer></script>
     </head>
     <body>
         <div class="container">
@@ -118,81 +200,82 @@ async def monitoring_dashboard():
                 <div id="logs-data">Loading...</div>
             </div>
         </div>
-        
-        <script>
-            // Fetch and display metrics
-            fetch('/api/v1/monitoring/metrics')
-                .then(response => response.json())
-                .then(data => {
-                    document.getElementById('uptime').textContent = Math.floor(data.uptime_seconds / 3600) + 'h ' + Math.floor((data.uptime_seconds % 3600) / 60) + 'm';
-                    document.getElementById('requests').textContent = data.total_requests.toLocaleString();
-                    document.getElementById('users').textContent = data.active_users;
-                    document.getElementById('interactions').textContent = data.total_interactions || '--';
-                })
-                .catch(error => {
-                    console.error('Error fetching metrics:', error);
-                });
-            
-            // Fetch and display analytics
-            fetch('/api/v1/analytics/overview?days=1')
-                .then(response => response.json())
-                .then(data => {
-                    const analyticsHtml = `
-                        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px;">
-                            <div><strong>Total Interactions:</strong> ${data.total_interactions}</div>
-                            <div><strong>Unique Users:</strong> ${data.unique_users}</div>
-                            <div><strong>Avg Message Length:</strong> ${data.avg_message_length || 'N/A'}</div>
-                            <div><strong>Popular Topics:</strong> ${data.popular_topics ? data.popular_topics.slice(0, 3).join(', ') : 'N/A'}</div>
-                        </div>
-                    `;
-                    document.getElementById('analytics-data').innerHTML = analyticsHtml;
-                })
-                .catch(error => {
-                    document.getElementById('analytics-data').innerHTML = '<p style="color: #666;">Analytics data unavailable</p>';
-                });
-            
-            // Fetch and display logs
-            fetch('/api/v1/monitoring/logs?limit=10')
-                .then(response => response.json())
-                .then(data => {
-                    const logsHtml = data.logs.map(log => `
-                        <div class="log-entry log-${log.level.toLowerCase()}">
-                            <strong>${new Date(log.timestamp).toLocaleString()}</strong> [${log.level}] 
-                            ${log.message} <em>(${log.module}:${log.line_number})</em>
-                        </div>
-                    `).join('');
-                    document.getElementById('logs-data').innerHTML = logsHtml || '<p>No recent logs</p>';
-                })
-                .catch(error => {
-                    document.getElementById('logs-data').innerHTML = '<p style="color: #666;">Logs unavailable</p>';
-                });
-        </script>
     </body>
     </html>
-    """
-    return HTMLResponse(content=html_content)
+    """.format(
+    css_version=hashlib.sha256(DASHBOARD_CSS_BYTES).hexdigest()[:12],
+    js_version=hashlib.sha256(DASHBOARD_JS_BYTES).hexdigest()[:12],
+).encode("utf-8")
+
+
+async def _fetch_table_counts(db_session: AsyncSession) -> Dict[str, int]:
+    """Fetch user and interaction row counts in a single round trip."""
+    if db_session.get_bind().dialect.name == "postgresql":
+        rows = await db_session.execute(APPROXIMATE_COUNTS_SQL, {"tables": list(COUNTED_TABLES)})
+        # reltuples is -1 for tables that were never analyzed
+        return {relname: max(int(reltuples), 0) for relname, reltuples in rows}
+    
+    result = await db_session.execute(EXACT_COUNTS_SQL)
+    return dict(result.one()._mapping)
+
+
+@router.get("/monitoring/dashboard", response_class=HTMLResponse)
+async def monitoring_dashboard():
+    """Simple HTML dashboard for monitoring."""
+    return HTMLResponse(
+        content=DASHBOARD_HTML_BYTES,
+        headers={"Cache-Control": "public, max-age=300"}
+    )
+
+
+def _static_asset_response(
+    request: Request,
+    body: bytes,
+    gzipped_body: bytes,
+    media_type: str
+) -> Response:
+    """Serve a precompressed asset, or the plain bytes if gzip isn't accepted."""
+    headers = {"Cache-Control": STATIC_ASSET_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = gzipped_body
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@router.get("/monitoring/dashboard.css", include_in_schema=False)
+async def monitoring_dashboard_css(request: Request):
+    """Stylesheet for the monitoring dashboard."""
+    return _static_asset_response(request, DASHBOARD_CSS_BYTES, DASHBOARD_CSS_GZIP, "text/css")
+
+
+@router.get("/monitoring/dashboard.js", include_in_schema=False)
+async def monitoring_dashboard_js(request: Request):
+    """Script for the monitoring dashboard."""
+    return _static_asset_response(
+        request, DASHBOARD_JS_BYTES, DASHBOARD_JS_GZIP, "application/javascript"
+    )
 
 
 @router.get("/monitoring/metrics", response_model=SystemMetrics)
-async def get_system_metrics():
+async def get_system_metrics(now: datetime = Depends(get_now)):
     """Get current system metrics."""
     try:
-        # Get database session to check connectivity
-        db_session = db_manager.get_session()
-        
         # Get basic metrics
         total_requests = 0  # Would need to implement request counting
         active_users = 0
         total_interactions = 0
         
         try:
-            # Count users
-            user_count = db_session.execute("SELECT COUNT(*) FROM users").scalar()
-            active_users = user_count or 0
+            counts = table_counts_cache.get("counts")
+            if counts is None:
+                # Borrow a pooled connection only on cache misses and hand it
+                # straight back afterwards
+                async with db_manager.async_session() as db_session:
+                    counts = await _fetch_table_counts(db_session)
+                table_counts_cache.set("counts", counts)
             
-            # Count interactions
-            interaction_count = db_session.execute("SELECT COUNT(*) FROM interactions").scalar()
-            total_interactions = interaction_count or 0
+            active_users = counts.get("users", 0)
+            total_interactions = counts.get("interactions", 0)
             
         except Exception as e:
             logger.warning(f"Could not fetch database metrics: {e}")
@@ -203,7 +286,7 @@ async def get_system_metrics():
         # Simulate system metrics
         memory_usage_mb = 128.5
         cpu_usage_percent = 15.2
-        database_connections = 5
+        database_connections = db_manager.async_engine.pool.checkedout()
         
         return SystemMetrics(
             uptime_seconds=uptime_seconds,
@@ -212,7 +295,7 @@ async def get_system_metrics():
             database_connections=database_connections,
             memory_usage_mb=memory_usage_mb,
             cpu_usage_percent=cpu_usage_percent,
-            last_updated=datetime.now(timezone.utc)
+            last_updated=now.replace(tzinfo=timezone.utc)
         )
         
     except Exception as e:
@@ -220,15 +303,63 @@ async def get_system_metrics():
         raise HTTPException(status_code=500, detail="Failed to get system metrics")
 
 
+def _tail_log_entries(path: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Parse the last JSON log lines from the end of a log file.
+    
+    Args:
+        path: Path to a JSON-lines log file
+        limit: Maximum number of entries to return
+        
+    Returns:
+        Up to ``limit`` of the most recent log entries, oldest first
+    """
+    entries: deque = deque(maxlen=limit)
+    with open(path, "rb") as log_file:
+        size = os.fstat(log_file.fileno()).st_size
+        offset = max(0, size - LOG_TAIL_BYTES)
+        log_file.seek(offset)
+        if offset:
+            # Discard the partial line the seek landed in
+            log_file.readline()
+        
+        for line in log_file:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # Non-JSON output from third-party loggers
+                continue
+            if isinstance(record, dict):
+                entries.append(_to_log_entry(record))
+    
+    return list(entries)
+
+
+def _to_log_entry(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a structlog JSON record onto the LogEntry fields the dashboard reads."""
+    return {
+        "timestamp": record.get("timestamp"),
+        "level": str(record.get("level", "info")).upper(),
+        "message": record.get("event", ""),
+        "module": record.get("logger", ""),
+        "function": record.get("func_name", ""),
+        "line_number": record.get("lineno", 0),
+    }
+
+
 @router.get("/monitoring/logs")
 async def get_recent_logs(limit: int = Query(10, ge=1, le=100)):
     """Get recent application logs."""
     try:
-        # In a real implementation, this would read from log files
-        # For demo purposes, we'll return some sample logs
+        if settings.log_file and os.path.exists(settings.log_file):
+            entries = await asyncio.to_thread(_tail_log_entries, settings.log_file, limit)
+            return json_bytes_response(orjson.dumps({"logs": entries}))
+        
+        # Without a log file, return some sample logs for the dashboard
+        now = datetime.now(timezone.utc)
         sample_logs = [
             {
-                "timestamp": datetime.now(timezone.utc) - timedelta(minutes=5),
+                "timestamp": now - timedelta(minutes=5),
                 "level": "INFO",
                 "message": "Application started successfully",
                 "module": "app",
@@ -236,7 +367,7 @@ async def get_recent_logs(limit: int = Query(10, ge=1, le=100)):
                 "line_number": 45
             },
             {
-                "timestamp": datetime.now(timezone.utc) - timedelta(minutes=3),
+                "timestamp": now - timedelta(minutes=3),
                 "level": "INFO",
                 "message": "Database connection established",
                 "module": "database.connection",
@@ -244,7 +375,7 @@ async def get_recent_logs(limit: int = Query(10, ge=1, le=100)):
                 "line_number": 23
             },
             {
-                "timestamp": datetime.now(timezone.utc) - timedelta(minutes=1),
+                "timestamp": now - timedelta(minutes=1),
                 "level": "INFO",
                 "message": "Health check endpoint accessed",
                 "module": "api.routes.health",
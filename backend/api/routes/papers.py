@@ -3,15 +3,23 @@ Papers endpoints for the Sleep Science Explainer Bot.
 """
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from itertools import islice
+from typing import Iterator, List, Optional, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
+from backend.api.dependencies import get_now
+from backend.api.responses import ORJSONModelResponse, json_bytes_response
 from backend.core.logging import get_logger
 from backend.data.nih_client import NIHClient
-from backend.data.sleep_recommendations import SleepRecommendationsClient
-from backend.models.papers import ResearchPaper
+from backend.data.sleep_recommendations import (
+    SleepRecommendationsClient,
+    get_sleep_recommendations_client
+)
+from backend.models.papers import RESEARCH_PAPER_ADAPTER, ResearchPaper
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -45,17 +53,93 @@ class PaperSearchResponse(BaseModel):
     search_timestamp: datetime
 
 
-# Initialize clients
+# Static topic and category payloads, serialized once at import
+PAPER_TOPICS = {
+    "sleep_cycles": [
+        "circadian rhythm",
+        "sleep wake cycle",
+        "REM sleep",
+        "NREM sleep"
+    ],
+    "sleep_disorders": [
+        "insomnia",
+        "sleep apnea",
+        "narcolepsy",
+        "restless leg syndrome"
+    ],
+    "sleep_hygiene": [
+        "sleep hygiene",
+        "sleep environment",
+        "bedtime routine",
+        "sleep habits"
+    ],
+    "sleep_research": [
+        "sleep research",
+        "sleep studies",
+        "sleep science",
+        "sleep medicine"
+    ],
+    "sleep_and_health": [
+        "sleep and health",
+        "sleep and disease",
+        "sleep and mental health",
+        "sleep and physical health"
+    ]
+}
+
+RECOMMENDATION_CATEGORIES = [
+    "sleep_schedule",
+    "sleep_environment", 
+    "sleep_hygiene",
+    "sleep_monitoring",
+    "circadian_rhythm",
+    "sleep_physiology",
+    "exercise",
+    "sleep_stages",
+    "sleep_duration",
+    "diet"
+]
+
+PAPER_TOPICS_BODY = orjson.dumps({"topics": PAPER_TOPICS})
+RECOMMENDATION_CATEGORIES_BODY = orjson.dumps({"categories": RECOMMENDATION_CATEGORIES})
+
+
+# Initialize clients. NIHClient caches search results itself, so the
+# helpers below don't add a cache layer of their own.
 nih_client = NIHClient()
-sleep_recommendations_client = SleepRecommendationsClient()
 
 
-@router.get("/papers/search", response_model=PaperSearchResponse)
+def _dump_papers(papers: List[ResearchPaper]) -> List[Dict[str, Any]]:
+    """
+    Dump papers to plain dicts for the response.
+    
+    Papers are built and validated by the NIH client, so their field values
+    are read straight from ``__dict__`` rather than re-walked by
+    ``model_dump``. Every field is a type orjson encodes natively.
+    """
+    return [paper.__dict__ for paper in papers]
+
+
+async def _search_pubmed(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """Search PubMed and dump the resulting papers."""
+    papers = await nih_client.search_papers(query=query, max_results=max_results)
+    return _dump_papers(papers)
+
+
+async def _recent_pubmed_papers(days: int, max_results: int) -> List[Dict[str, Any]]:
+    """Fetch recent PubMed papers and dump them."""
+    papers = await nih_client.get_recent_papers(days=days, max_results=max_results)
+    return _dump_papers(papers)
+
+
+@router.get("/papers/search", responses={200: {"model": PaperSearchResponse}})
 async def search_papers(
     query: str = Query(..., description="Search query for sleep science papers"),
     max_results: int = Query(10, ge=1, le=50, description="Maximum number of results"),
-    source: str = Query("all", description="Data source (pubmed, recommendations, all)")
-) -> PaperSearchResponse:
+    source: str = Query("all", description="Data source (pubmed, recommendations, all)"),
+    now: datetime = Depends(get_now),
+    recommendations_client: SleepRecommendationsClient = Depends(get_sleep_recommendations_client)
+) -> ORJSONModelResponse:
     """
     Search for sleep science research papers and recommendations.
     
@@ -75,38 +159,46 @@ async def search_papers(
         
         if source.lower() == "pubmed":
             # Search PubMed only
-            pubmed_results = await nih_client.search_papers(
+            pubmed_results = await _search_pubmed(
                 query=query,
                 max_results=max_results
             )
             papers.extend(pubmed_results)
         elif source.lower() == "recommendations":
             # Search recommendations only
-            rec_results = await sleep_recommendations_client.search_recommendations(
+            rec_results = recommendations_client.search_recommendations(
                 query=query,
                 max_results=max_results
             )
             recommendations.extend(rec_results)
         else:
-            # Search both sources
-            pubmed_results = await nih_client.search_papers(
-                query=query,
-                max_results=max_results // 2
-            )
-            rec_results = await sleep_recommendations_client.search_recommendations(
+            # Recommendations are searched in memory; a failing PubMed
+            # search is logged and skipped so they can still answer
+            rec_results = recommendations_client.search_recommendations(
                 query=query,
                 max_results=max_results // 2
             )
-            papers.extend(pubmed_results)
             recommendations.extend(rec_results)
+            try:
+                pubmed_results = await _search_pubmed(
+                    query=query,
+                    max_results=max_results // 2
+                )
+                papers.extend(pubmed_results)
+            except Exception as e:
+                logger.warning(
+                    "PubMed search failed",
+                    error=str(e),
+                    query=query
+                )
         
-        return PaperSearchResponse(
-            papers=papers,
-            recommendations=recommendations,
-            total_count=len(papers) + len(recommendations),
-            query=query,
-            search_timestamp=datetime.utcnow()
-        )
+        return ORJSONModelResponse({
+            "papers": papers,
+            "recommendations": recommendations,
+            "total_count": len(papers) + len(recommendations),
+            "query": query,
+            "search_timestamp": now
+        })
         
     except Exception as e:
         logger.error(
@@ -120,8 +212,24 @@ async def search_papers(
         )
 
 
-@router.get("/papers/{paper_id}", response_model=ResearchPaper)
-async def get_paper_details(paper_id: str) -> ResearchPaper:
+async def _fetch_paper(paper_id: str) -> Optional[ResearchPaper]:
+    """
+    Fetch a paper from its upstream source.
+    
+    Args:
+        paper_id: Unique identifier for the paper
+        
+    Returns:
+        The paper, or None if the ID is unknown or not found
+    """
+    # Only PubMed papers are supported so far
+    if not paper_id.startswith("PMID"):
+        return None
+    return await nih_client.get_paper_details(paper_id)
+
+
+@router.get("/papers/{paper_id}", responses={200: {"model": ResearchPaper}})
+async def get_paper_details(paper_id: str) -> Response:
     """
     Get detailed information about a specific research paper.
     
@@ -134,14 +242,7 @@ async def get_paper_details(paper_id: str) -> ResearchPaper:
     logger.info("Paper details requested", paper_id=paper_id)
     
     try:
-        # Try to get paper from PubMed
-        if paper_id.startswith("PMID"):
-            paper = await nih_client.get_paper_details(paper_id)
-        else:
-            raise HTTPException(
-                status_code=404,
-                detail="Paper not found"
-            )
+        paper = await _fetch_paper(paper_id)
         
         if not paper:
             raise HTTPException(
@@ -149,7 +250,8 @@ async def get_paper_details(paper_id: str) -> ResearchPaper:
                 detail="Paper not found"
             )
         
-        return paper
+        # Already validated by the client; skip FastAPI's re-validation
+        return json_bytes_response(RESEARCH_PAPER_ADAPTER.dump_json(paper))
         
     except HTTPException:
         raise
@@ -165,8 +267,11 @@ async def get_paper_details(paper_id: str) -> ResearchPaper:
         )
 
 
-@router.get("/recommendations/{rec_id}", response_model=SleepRecommendation)
-async def get_recommendation_details(rec_id: str) -> SleepRecommendation:
+@router.get("/recommendations/{rec_id}", responses={200: {"model": SleepRecommendation}})
+async def get_recommendation_details(
+    rec_id: str,
+    recommendations_client: SleepRecommendationsClient = Depends(get_sleep_recommendations_client)
+) -> ORJSONModelResponse:
     """
     Get detailed information about a specific sleep recommendation.
     
@@ -179,7 +284,7 @@ async def get_recommendation_details(rec_id: str) -> SleepRecommendation:
     logger.info("Recommendation details requested", rec_id=rec_id)
     
     try:
-        recommendation = await sleep_recommendations_client.get_recommendation_by_id(rec_id)
+        recommendation = recommendations_client.get_recommendation_by_id(rec_id)
         
         if not recommendation:
             raise HTTPException(
@@ -187,7 +292,7 @@ async def get_recommendation_details(rec_id: str) -> SleepRecommendation:
                 detail="Recommendation not found"
             )
         
-        return SleepRecommendation(**recommendation)
+        return ORJSONModelResponse(recommendation)
         
     except HTTPException:
         raise
@@ -203,11 +308,11 @@ async def get_recommendation_details(rec_id: str) -> SleepRecommendation:
         )
 
 
-@router.get("/papers/recent", response_model=List[ResearchPaper])
+@router.get("/papers/recent", responses={200: {"model": List[ResearchPaper]}})
 async def get_recent_papers(
     days: int = Query(30, ge=1, le=365, description="Number of days to look back"),
     max_results: int = Query(20, ge=1, le=100, description="Maximum number of results")
-) -> List[ResearchPaper]:
+) -> ORJSONModelResponse:
     """
     Get recent sleep science research papers.
     
@@ -226,12 +331,12 @@ async def get_recent_papers(
     
     try:
         # Get recent papers from PubMed
-        recent_papers = await nih_client.get_recent_papers(
+        recent_papers = await _recent_pubmed_papers(
             days=days,
             max_results=max_results
         )
         
-        return recent_papers
+        return ORJSONModelResponse(recent_papers)
         
     except Exception as e:
         logger.error(
@@ -245,12 +350,32 @@ async def get_recent_papers(
         )
 
 
-@router.get("/recommendations", response_model=List[SleepRecommendation])
+def _iter_recommendations(
+    all_recs: Dict[str, Any],
+    source: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """Lazily flatten recommendations by source, tagging each with its source."""
+    # Filter sources up front so the flattening loop has no per-item branch
+    sources = all_recs.values()
+    if source:
+        sources = [data for data in sources if data["source"] == source]
+    
+    for source_data in sources:
+        for rec in source_data["recommendations"]:
+            yield {
+                **rec,
+                "source_name": source_data["name"],
+                "source": source_data["source"]
+            }
+
+
+@router.get("/recommendations", responses={200: {"model": List[SleepRecommendation]}})
 async def get_recommendations(
     category: Optional[str] = Query(None, description="Filter by category"),
     source: Optional[str] = Query(None, description="Filter by source"),
-    max_results: int = Query(20, ge=1, le=100, description="Maximum number of results")
-) -> List[SleepRecommendation]:
+    max_results: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    recommendations_client: SleepRecommendationsClient = Depends(get_sleep_recommendations_client)
+) -> ORJSONModelResponse:
     """
     Get sleep recommendations.
     
@@ -271,24 +396,17 @@ async def get_recommendations(
     
     try:
         if category:
-            recommendations = await sleep_recommendations_client.get_recommendations_by_category(
+            recommendations = recommendations_client.get_recommendations_by_category(
                 category=category,
                 source=source
             )
+            recommendations = recommendations[:max_results]
         else:
-            all_recs = await sleep_recommendations_client.get_all_recommendations()
-            recommendations = []
-            for source_data in all_recs.values():
-                if source and source_data["source"] != source:
-                    continue
-                for rec in source_data["recommendations"]:
-                    recommendations.append({
-                        **rec,
-                        "source_name": source_data["name"],
-                        "source": source_data["source"]
-                    })
+            all_recs = recommendations_client.get_all_recommendations()
+            # Stop flattening once max_results recommendations are collected
+            recommendations = list(islice(_iter_recommendations(all_recs, source), max_results))
         
-        return [SleepRecommendation(**rec) for rec in recommendations[:max_results]]
+        return ORJSONModelResponse(recommendations)
         
     except Exception as e:
         logger.error(
@@ -302,7 +420,7 @@ async def get_recommendations(
 
 
 @router.get("/papers/topics")
-async def get_paper_topics() -> Dict[str, List[str]]:
+async def get_paper_topics() -> Response:
     """
     Get available topics for paper search.
     
@@ -311,44 +429,11 @@ async def get_paper_topics() -> Dict[str, List[str]]:
     """
     logger.info("Paper topics requested")
     
-    topics = {
-        "sleep_cycles": [
-            "circadian rhythm",
-            "sleep wake cycle",
-            "REM sleep",
-            "NREM sleep"
-        ],
-        "sleep_disorders": [
-            "insomnia",
-            "sleep apnea",
-            "narcolepsy",
-            "restless leg syndrome"
-        ],
-        "sleep_hygiene": [
-            "sleep hygiene",
-            "sleep environment",
-            "bedtime routine",
-            "sleep habits"
-        ],
-        "sleep_research": [
-            "sleep research",
-            "sleep studies",
-            "sleep science",
-            "sleep medicine"
-        ],
-        "sleep_and_health": [
-            "sleep and health",
-            "sleep and disease",
-            "sleep and mental health",
-            "sleep and physical health"
-        ]
-    }
-    
-    return {"topics": topics}
+    return json_bytes_response(PAPER_TOPICS_BODY)
 
 
 @router.get("/recommendations/categories")
-async def get_recommendation_categories() -> Dict[str, List[str]]:
+async def get_recommendation_categories() -> Response:
     """
     Get available categories for sleep recommendations.
     
@@ -357,26 +442,14 @@ async def get_recommendation_categories() -> Dict[str, List[str]]:
     """
     logger.info("Recommendation categories requested")
     
-    categories = [
-        "sleep_schedule",
-        "sleep_environment", 
-        "sleep_hygiene",
-        "sleep_monitoring",
-        "circadian_rhythm",
-        "sleep_physiology",
-        "exercise",
-        "sleep_stages",
-        "sleep_duration",
-        "diet"
-    ]
-    
-    return {"categories": categories}
+    return json_bytes_response(RECOMMENDATION_CATEGORIES_BODY)
 
 
 @router.post("/papers/summarize")
 async def summarize_paper(
     paper_id: str,
-    summary_length: str = Query("medium", description="Summary length (short, medium, long)")
+    summary_length: str = Query("medium", description="Summary length (short, medium, long)"),
+    now: datetime = Depends(get_now)
 ) -> Dict[str, Any]:
     """
     Generate a summary of a research paper.
@@ -396,7 +469,12 @@ async def summarize_paper(
     
     try:
         # Get paper details
-        paper = await get_paper_details(paper_id)
+        paper = await _fetch_paper(paper_id)
+        if not paper:
+            raise HTTPException(
+                status_code=404,
+                detail="Paper not found"
+            )
         
         # TODO: Implement AI summarization using Bedrock
         # For now, return a placeholder
@@ -411,7 +489,7 @@ async def summarize_paper(
             ],
             "clinical_implications": "Clinical implications will be generated by AI",
             "summary_length": summary_length,
-            "generated_at": datetime.utcnow()
+            "generated_at": now
         }
         
         return summary
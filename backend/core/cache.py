@@ -0,0 +1,101 @@
+"""
+In-process caching utilities for the Sleep Science Explainer Bot.
+"""
+
+import asyncio
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, ttl: float, maxsize: int = 128):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid
+            maxsize: Maximum number of entries kept before evicting the oldest
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at < monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full."""
+        self._data[key] = (monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def ttl_cache(
+    ttl: float,
+    maxsize: int = 128
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Cache the results of an async function keyed on its arguments.
+
+    Concurrent misses for the same arguments share a single call, so a
+    burst of identical requests reaches the wrapped function once. The
+    wrapped function keeps its signature, so it can decorate FastAPI
+    endpoints directly. The underlying cache is exposed as ``.cache``.
+
+    Args:
+        ttl: Seconds a result stays valid
+        maxsize: Maximum number of distinct argument combinations cached
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        cache = TTLCache(ttl=ttl, maxsize=maxsize)
+        in_flight: Dict[Hashable, "asyncio.Future[T]"] = {}
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            key = (args, tuple(sorted(kwargs.items())))
+            result = cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+
+            task = in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                in_flight[key] = task
+                task.add_done_callback(lambda _: in_flight.pop(key, None))
+
+            # Shielded so one cancelled caller doesn't cancel the shared call
+            result = await asyncio.shield(task)
+            cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,28 @@
+"""
+Identifier generation for the Sleep Science Explainer Bot.
+"""
+
+import os
+import uuid
+from time import time_ns
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID (RFC 9562 version 7).
+    
+    The leading 48 bits are the Unix time in milliseconds, so new IDs sort
+    after older ones and B-tree inserts land on the rightmost index page
+    instead of a random one.
+    """
+    timestamp_ms = time_ns() // 1_000_000
+    value = (timestamp_ms << 80) | int.from_bytes(os.urandom(10), "big")
+    # Set version 7 and the RFC 4122 variant bits
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """Return a new time-ordered ID in the 36-character string form stored in the database."""
+    return str(uuid7())
@@ -3,14 +3,37 @@ Logging configuration for the Sleep Science Explainer Bot.
 """
 
 import logging
+import os
 import sys
+from functools import lru_cache
 from typing import Any, Dict
 
+import orjson
 import structlog
 from structlog.stdlib import LoggerFactory
 
 from backend.core.config import settings
 
+# Resolved once at import instead of on every settings read
+LOG_LEVEL = getattr(logging, settings.log_level.upper())
+
+
+def _orjson_dumps(obj: Any, default: Any = None, **kwargs: Any) -> str:
+    """Serialize a log event with orjson for structlog's JSONRenderer."""
+    return orjson.dumps(obj, default=default).decode("utf-8")
+
+
+class BytesStreamHandler(logging.StreamHandler):
+    """Stream handler that writes UTF-8 bytes straight to a binary stream."""
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write the formatted record, skipping the text-layer encoder."""
+        try:
+            self.stream.write(self.format(record).encode("utf-8") + b"\n")
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
 
 def setup_logging() -> None:
     """Setup structured logging configuration."""
@@ -23,10 +46,11 @@ def setup_logging() -> None:
             structlog.stdlib.add_log_level,
             structlog.stdlib.PositionalArgumentsFormatter(),
             structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
+            # format_exc_info is a no-op unless exc_info is set; stack
+            # rendering is left out since nothing logs with stack_info
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps)
         ],
         context_class=dict,
         logger_factory=LoggerFactory(),
@@ -34,21 +58,37 @@ def setup_logging() -> None:
         cache_logger_on_first_use=True,
     )
     
-    # Configure standard library logging
+    # Configure standard library logging, writing to stdout's byte buffer
+    # when it has one
+    stdout_buffer = getattr(sys.stdout, "buffer", None)
+    handler = (
+        BytesStreamHandler(stdout_buffer)
+        if stdout_buffer is not None
+        else logging.StreamHandler(sys.stdout)
+    )
+    handlers = [handler]
+    
+    # Optional JSON-lines log file, tailed by the monitoring logs endpoint
+    if settings.log_file:
+        os.makedirs(os.path.dirname(settings.log_file) or ".", exist_ok=True)
+        handlers.append(BytesStreamHandler(open(settings.log_file, "ab")))
+    
     logging.basicConfig(
         format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.log_level.upper()),
+        handlers=handlers,
+        level=LOG_LEVEL,
     )
     
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
-    logging.getLogger("uvicorn.access").setLevel(logging.INFO)
+    # Requests are logged by RequestLoggingMiddleware; silence the duplicate access log
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("fastapi").setLevel(logging.INFO)
     logging.getLogger("boto3").setLevel(logging.WARNING)
     logging.getLogger("botocore").setLevel(logging.WARNING)
 
 
+@lru_cache(maxsize=None)
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """Get a structured logger instance."""
     return structlog.get_logger(name)
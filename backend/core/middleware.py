@@ -2,123 +2,294 @@
 Middleware for the Sleep Science Explainer Bot.
 """
 
-from time import time
-from typing import Dict, Any, Optional
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.types import ASGIApp
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from time import monotonic, perf_counter, time
+from typing import List, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import RedisError
 import structlog
 
 from backend.core.config import settings
 
+# Probe endpoints answered by HealthProbeMiddleware ahead of the other middleware
+HEALTH_PATHS = frozenset({"/health", "/health/detailed", "/ready"})
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+# Atomic token bucket shared by all workers. Returns 1 if the request may
+# proceed, 0 if the bucket is empty.
+#   KEYS[1] = bucket key
+#   ARGV[1] = capacity, ARGV[2] = refill rate (tokens/ms), ARGV[3] = now (ms)
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / refill_rate))
+return allowed
+"""
+
+# How long to fall back to in-process limiting after Redis fails
+REDIS_RETRY_SECONDS = 30.0
+
+# In-process buckets are split across shards so idle sweeps stay small;
+# must be a power of two
+BUCKET_SHARDS = 16
+# Upper bound on tracked clients; least recently seen are evicted first
+MAX_TRACKED_CLIENTS = 100_000
+
+# Rejection response, serialized once
+RATE_LIMIT_BODY = orjson.dumps({"detail": "Rate limit exceeded"})
+RATE_LIMIT_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(RATE_LIMIT_BODY)).encode("latin-1")),
+]
+
+
+class HealthProbeMiddleware:
+    """Route health probes to a dedicated app ahead of the middleware stack."""
+
+    def __init__(self, app: ASGIApp, probe_app: ASGIApp):
+        self.app = app
+        self.probe_app = probe_app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Send probe paths to the probe app and everything else on down the stack."""
+        if scope["type"] == "http" and scope["path"] in HEALTH_PATHS:
+            await self.probe_app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class RequestLoggingMiddleware:
     """Middleware for logging HTTP requests."""
-    
-    def __init__(self, app):
-        super().__init__(app)
-        self.logger = structlog.get_logger(__name__)
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.logger = structlog.get_logger(__name__).bind(component="http")
+        # Checked before building log fields, so disabled levels cost nothing
+        self.level_check = logging.getLogger(__name__)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Log request details and timing."""
-        start_time = time()
-        
-        # Log request
-        self.logger.info(
-            "Request started",
-            method=request.method,
-            url=str(request.url),
-            client_ip=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent"),
-        )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time() - start_time
-        
-        # Log response
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = perf_counter()
+        # Shared with handlers through the get_now dependency
+        scope.setdefault("state", {})["now"] = datetime.utcnow()
+        status_code = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+        # One structured line per request, once the body (including any
+        # streamed body) has been sent; uvicorn's access log is off
+        if not self.level_check.isEnabledFor(logging.INFO):
+            return
+
         self.logger.info(
             "Request completed",
-            method=request.method,
-            url=str(request.url),
-            status_code=response.status_code,
-            duration=duration,
+            method=scope["method"],
+            path=scope["path"],
+            status_code=status_code,
+            duration_ms=round((perf_counter() - start_time) * 1000, 2),
+            client_ip=scope["client"][0] if scope.get("client") else None,
+            user_agent=_get_header(scope, b"user-agent"),
         )
-        
-        return response
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """Middleware for rate limiting requests."""
-    
-    def __init__(self, app):
-        super().__init__(app)
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.logger = structlog.get_logger(__name__)
-        self.request_counts: Dict[str, Dict[str, Any]] = {}
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+
+        # Limits are fixed for the process lifetime; read settings once
+        self.limit = settings.rate_limit_requests
+        self.window = settings.rate_limit_window
+
+        # In-process token buckets as [tokens, last_refill] per client,
+        # on the monotonic clock; only used while Redis is unreachable
+        self.bucket_shards: List["OrderedDict[str, List[float]]"] = [
+            OrderedDict() for _ in range(BUCKET_SHARDS)
+        ]
+        self.max_shard_clients = MAX_TRACKED_CLIENTS // BUCKET_SHARDS
+        # Started and stopped with the application lifespan
+        self.sweeper: Optional["asyncio.Task[None]"] = None
+        self.capacity = float(self.limit)
+        self.refill_rate = self.limit / self.window
+        # Redis timestamps are in milliseconds
+        self.refill_rate_ms = self.refill_rate / 1000
+
+        # Redis-backed token bucket shared by all workers
+        self.redis = redis.from_url(
+            settings.redis_url,
+            password=settings.redis_password,
+            socket_connect_timeout=0.25,
+            socket_timeout=0.25,
+        )
+        self.token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self.redis_retry_at = 0.0
+
+        # Static limit headers added to every allowed response
+        self.limit_headers = [
+            (b"x-ratelimit-limit", str(self.limit).encode("latin-1")),
+            (b"x-ratelimit-window", str(self.window).encode("latin-1")),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Apply rate limiting to requests."""
-        client_ip = request.client.host if request.client else "unknown"
+        if scope["type"] == "lifespan":
+            await self.app(scope, self._lifespan_receive(receive), send)
+            return
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
         current_time = time()
-        
-        # Clean old entries
-        self._cleanup_old_entries(current_time)
-        
+
         # Check rate limit
-        if not self._check_rate_limit(client_ip, current_time):
+        allowed = await self._check_redis_rate_limit(client_ip, current_time)
+        if allowed is None:
+            allowed = self._check_rate_limit(client_ip, monotonic())
+
+        if not allowed:
             self.logger.warning(
                 "Rate limit exceeded",
                 client_ip=client_ip,
-                limit=settings.rate_limit_requests,
-                window=settings.rate_limit_window,
+                path=scope["path"],
+                limit=self.limit,
+                window=self.window,
             )
-            return Response(
-                content={"detail": "Rate limit exceeded"},
-                status_code=429,
-                media_type="application/json"
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": RATE_LIMIT_HEADERS,
+            })
+            await send({"type": "http.response.body", "body": RATE_LIMIT_BODY})
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Add rate limit headers
+                message["headers"] = [*message.get("headers", []), *self.limit_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _check_redis_rate_limit(self, client_ip: str, current_time: float) -> Optional[bool]:
+        """Consume a token from the client's Redis bucket, or None if Redis is unavailable."""
+        if current_time < self.redis_retry_at:
+            return None
+
+        try:
+            allowed = await self.token_bucket(
+                keys=[f"rate:{client_ip}"],
+                args=[
+                    self.limit,
+                    self.refill_rate_ms,
+                    int(current_time * 1000),
+                ],
             )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(settings.rate_limit_requests)
-        response.headers["X-RateLimit-Window"] = str(settings.rate_limit_window)
-        
-        return response
-    
-    def _check_rate_limit(self, client_ip: str, current_time: float) -> bool:
-        """Check if client has exceeded rate limit."""
-        if client_ip not in self.request_counts:
-            self.request_counts[client_ip] = {
-                "count": 0,
-                "window_start": current_time
-            }
-        
-        client_data = self.request_counts[client_ip]
-        
-        # Reset window if expired
-        if current_time - client_data["window_start"] > settings.rate_limit_window:
-            client_data["count"] = 0
-            client_data["window_start"] = current_time
-        
-        # Check limit
-        if client_data["count"] >= settings.rate_limit_requests:
+        except (RedisError, OSError) as e:
+            self.redis_retry_at = current_time + REDIS_RETRY_SECONDS
+            self.logger.warning(
+                "Redis rate limiting unavailable, using in-process limits",
+                error=str(e),
+                retry_in=REDIS_RETRY_SECONDS,
+            )
+            return None
+
+        return bool(allowed)
+
+    def _check_rate_limit(self, client_ip: str, now: float) -> bool:
+        """Take a token from the client's in-process bucket, refilling it lazily."""
+        # No await between read and update, so the event loop can't
+        # interleave requests here and the shards need no locks
+        buckets = self.bucket_shards[hash(client_ip) & (BUCKET_SHARDS - 1)]
+
+        bucket = buckets.get(client_ip)
+        if bucket is None:
+            buckets[client_ip] = [self.capacity - 1.0, now]
+            if len(buckets) > self.max_shard_clients:
+                buckets.popitem(last=False)
+            return True
+
+        buckets.move_to_end(client_ip)
+
+        bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+        bucket[1] = now
+        if bucket[0] < 1.0:
             return False
-        
-        # Increment count
-        client_data["count"] += 1
+
+        bucket[0] -= 1.0
         return True
-    
-    def _cleanup_old_entries(self, current_time: float) -> None:
-        """Remove old rate limit entries."""
-        expired_ips = []
-        for client_ip, client_data in self.request_counts.items():
-            if current_time - client_data["window_start"] > settings.rate_limit_window:
-                expired_ips.append(client_ip)
-        
-        for client_ip in expired_ips:
-            del self.request_counts[client_ip] 
\ No newline at end of file
+
+    def _sweep_idle_buckets(self, now: float) -> None:
+        """Drop buckets idle for a full window, which have refilled to capacity."""
+        for buckets in self.bucket_shards:
+            # Buckets are kept in least-recently-used order, so the idle
+            # ones are all at the front
+            while buckets:
+                client_ip, (_, last_refill) = next(iter(buckets.items()))
+                if now - last_refill < self.window:
+                    break
+                del buckets[client_ip]
+
+    async def _sweep_forever(self) -> None:
+        """Sweep idle buckets once per window, off the request path."""
+        while True:
+            await asyncio.sleep(self.window)
+            self._sweep_idle_buckets(monotonic())
+
+    def _lifespan_receive(self, receive: Receive) -> Receive:
+        """Wrap lifespan receive to run the sweeper and Redis client for the app's lifetime."""
+        async def wrapped_receive() -> Message:
+            message = await receive()
+            if message["type"] == "lifespan.startup" and self.sweeper is None:
+                self.sweeper = asyncio.create_task(self._sweep_forever())
+            elif message["type"] == "lifespan.shutdown":
+                if self.sweeper is not None:
+                    self.sweeper.cancel()
+                    self.sweeper = None
+                await self.redis.aclose()
+            return message
+
+        return wrapped_receive
+
+
+def _get_header(scope: Scope, name: bytes) -> Optional[str]:
+    """
+    Return a decoded request header from the ASGI scope, if present.
+
+    ASGI header names are already lowercased bytes, so this is a single
+    pass over the raw list that decodes only the matching value.
+    """
+    return next(
+        (value.decode("latin-1") for key, value in scope.get("headers", ()) if key == name),
+        None,
+    )
+
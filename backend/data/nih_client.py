@@ -4,14 +4,39 @@ NIH PubMed API client for the Sleep Science Explainer Bot.
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 import httpx
-import xml.etree.ElementTree as ET
+from lxml import etree
 
+from backend.core.cache import TTLCache, ttl_cache
 from backend.core.logging import LoggerMixin
 from backend.core.config import settings
 from backend.models.papers import ResearchPaper
 
+# Keep-alive pool shared by every PubMed request from this client
+NIH_CONNECTION_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+# NCBI allows 3 requests/second without an API key and 10 with one; cap
+# concurrent detail fetches to match
+NIH_MAX_CONCURRENT_FETCHES = 10 if settings.nih_api_key else 3
+
+# Search results change slowly; individual papers effectively never do
+NIH_SEARCH_CACHE_TTL_SECONDS = 900
+NIH_SEARCH_CACHE_MAXSIZE = 512
+NIH_DETAIL_CACHE_TTL_SECONDS = 86400
+NIH_DETAIL_CACHE_MAXSIZE = 4096
+
+# Read size for streamed efetch responses
+NIH_STREAM_CHUNK_SIZE = 64 * 1024
+
+# PubMed XML never needs entity expansion or network access to parse
+NIH_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+def _format_pubmed_date(value: datetime) -> str:
+    """Format a date as PubMed's YYYY/MM/DD without going through strftime."""
+    return f"{value.year:04d}/{value.month:02d}/{value.day:02d}"
+
 
 class NIHClient(LoggerMixin):
     """
@@ -24,6 +49,18 @@ class NIHClient(LoggerMixin):
     - Parsing PubMed XML responses
     """
     
+    # XPath expressions compiled once and reused for every article
+    _XP_ID_LIST = etree.XPath(".//IdList/Id/text()")
+    _XP_MEDLINE_CITATION = etree.XPath(".//MedlineCitation")
+    _XP_PMID = etree.XPath("PMID/text()")
+    _XP_TITLE = etree.XPath(".//ArticleTitle")
+    _XP_AUTHORS = etree.XPath(".//AuthorList/Author")
+    _XP_ABSTRACT = etree.XPath(".//Abstract/AbstractText")
+    _XP_JOURNAL = etree.XPath(".//Journal/Title")
+    _XP_DOI = etree.XPath(".//ArticleIdList/ArticleId[@IdType='doi']/text()")
+    _XP_KEYWORDS = etree.XPath(".//KeywordList/Keyword/text()")
+    _XP_PUB_DATE = etree.XPath(".//PubDate")
+    
     def __init__(self):
         """Initialize the NIH client."""
         self.logger.info("Initializing NIHClient")
@@ -32,8 +69,24 @@ class NIHClient(LoggerMixin):
         self.api_key = settings.nih_api_key
         self.timeout = 30.0
         
+        # One pooled HTTP/2 client, so repeat requests reuse the TLS session
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=NIH_CONNECTION_LIMITS,
+            http2=True
+        )
+        self._fetch_semaphore = asyncio.Semaphore(NIH_MAX_CONCURRENT_FETCHES)
+        self._detail_cache = TTLCache(
+            ttl=NIH_DETAIL_CACHE_TTL_SECONDS,
+            maxsize=NIH_DETAIL_CACHE_MAXSIZE
+        )
+        
         self.logger.info("NIHClient initialized successfully")
     
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._client.aclose()
+    
     async def search_papers(
         self,
         query: str,
@@ -71,46 +124,17 @@ class NIHClient(LoggerMixin):
             
             # Add date filters if provided
             if publication_date_from:
-                params["mindate"] = publication_date_from.strftime("%Y/%m/%d")
+                params["mindate"] = _format_pubmed_date(publication_date_from)
             if publication_date_to:
-                params["maxdate"] = publication_date_to.strftime("%Y/%m/%d")
+                params["maxdate"] = _format_pubmed_date(publication_date_to)
             
             # Add API key if available
             if self.api_key:
                 params["api_key"] = self.api_key
             
-            # Make search request
-            search_url = f"{self.base_url}/esearch.fcgi"
+            # Identical searches, down to the formatted dates, share results
+            return await self._search(tuple(sorted(params.items())), max_results)
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(search_url, params=params)
-                response.raise_for_status()
-                
-                # Parse search results
-                search_data = ET.fromstring(response.text)
-                id_list = search_data.find(".//IdList")
-                
-                if id_list is None:
-                    self.logger.warning("No search results found")
-                    return []
-                
-                # Get paper IDs
-                paper_ids = [id_elem.text for id_elem in id_list.findall("Id")]
-                
-                # Fetch details for each paper
-                papers = []
-                for paper_id in paper_ids[:max_results]:
-                    try:
-                        paper = await self._fetch_paper_details(paper_id)
-                        if paper:
-                            papers.append(paper)
-                    except Exception as e:
-                        self.logger.warning(
-                            f"Failed to fetch paper {paper_id}: {e}"
-                        )
-                
-                return papers
-                
         except Exception as e:
             self.logger.error(
                 "Error searching PubMed papers",
@@ -119,6 +143,38 @@ class NIHClient(LoggerMixin):
             )
             raise
     
+    @ttl_cache(ttl=NIH_SEARCH_CACHE_TTL_SECONDS, maxsize=NIH_SEARCH_CACHE_MAXSIZE)
+    async def _search(
+        self,
+        params: Tuple[Tuple[str, Any], ...],
+        max_results: int
+    ) -> List[ResearchPaper]:
+        """
+        Run an esearch query and fetch the matching papers.
+        
+        Args:
+            params: Sorted esearch parameters, used as the cache key
+            max_results: Maximum number of results
+            
+        Returns:
+            List of research papers
+        """
+        search_url = f"{self.base_url}/esearch.fcgi"
+        
+        response = await self._client.get(search_url, params=dict(params))
+        response.raise_for_status()
+        
+        # Parse search results
+        search_data = etree.fromstring(response.content, NIH_XML_PARSER)
+        paper_ids = [str(paper_id) for paper_id in self._XP_ID_LIST(search_data)]
+        
+        if not paper_ids:
+            self.logger.warning("No search results found")
+            return []
+        
+        # Fetch details for all papers in one batched request
+        return await self._fetch_many(paper_ids[:max_results])
+    
     async def get_recent_papers(
         self,
         days: int = 30,
@@ -186,6 +242,10 @@ class NIHClient(LoggerMixin):
         Returns:
             ResearchPaper object or None
         """
+        paper = self._detail_cache.get(pmid)
+        if paper is not None:
+            return paper
+        
         try:
             # Build request parameters
             params = {
@@ -200,12 +260,15 @@ class NIHClient(LoggerMixin):
             # Make request
             fetch_url = f"{self.base_url}/efetch.fcgi"
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(fetch_url, params=params)
-                response.raise_for_status()
-                
-                # Parse XML response
-                return self._parse_pubmed_xml(response.text, pmid)
+            async with self._fetch_semaphore:
+                response = await self._client.get(fetch_url, params=params)
+            response.raise_for_status()
+            
+            # Parse XML response
+            paper = self._parse_pubmed_xml(response.content, pmid)
+            if paper:
+                self._detail_cache.set(pmid, paper)
+            return paper
                 
         except Exception as e:
             self.logger.error(
@@ -215,7 +278,70 @@ class NIHClient(LoggerMixin):
             )
             return None
     
-    def _parse_pubmed_xml(self, xml_content: str, pmid: str) -> Optional[ResearchPaper]:
+    async def _fetch_many(self, pmids: List[str]) -> List[ResearchPaper]:
+        """
+        Fetch details for several papers with a single efetch request.
+        
+        Args:
+            pmids: PubMed IDs
+            
+        Returns:
+            Research papers that could be parsed, in the order of pmids
+        """
+        # Only papers missing from the detail cache are requested
+        papers_by_pmid = {pmid: self._detail_cache.get(pmid) for pmid in pmids}
+        missing = [pmid for pmid, paper in papers_by_pmid.items() if paper is None]
+        if missing:
+            async for paper in self._fetch_uncached(missing):
+                self._detail_cache.set(paper.pmid, paper)
+                papers_by_pmid[paper.pmid] = paper
+        
+        return [paper for paper in papers_by_pmid.values() if paper is not None]
+    
+    async def _fetch_uncached(self, pmids: List[str]) -> AsyncIterator[ResearchPaper]:
+        """
+        Stream details for several papers from a single efetch call.
+        
+        Args:
+            pmids: PubMed IDs
+            
+        Yields:
+            Research papers as they are parsed from the response
+        """
+        params = {
+            "db": "pubmed",
+            "id": ",".join(pmids),
+            "retmode": "xml"
+        }
+        
+        if self.api_key:
+            params["api_key"] = self.api_key
+        
+        fetch_url = f"{self.base_url}/efetch.fcgi"
+        
+        # Parse articles as the body arrives, freeing each once parsed so
+        # memory stays bounded by a single article rather than the response
+        parser = etree.XMLPullParser(
+            events=("end",),
+            tag="PubmedArticle",
+            resolve_entities=False,
+            no_network=True
+        )
+        async with self._fetch_semaphore:
+            async with self._client.stream("GET", fetch_url, params=params) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(NIH_STREAM_CHUNK_SIZE):
+                    parser.feed(chunk)
+                    for _, article in parser.read_events():
+                        paper = self._parse_article_element(article)
+                        if paper:
+                            yield paper
+                        article.clear()
+                        while article.getprevious() is not None:
+                            del article.getparent()[0]
+        parser.close()
+    
+    def _parse_pubmed_xml(self, xml_content: bytes, pmid: str) -> Optional[ResearchPaper]:
         """
         Parse PubMed XML response.
         
@@ -227,60 +353,78 @@ class NIHClient(LoggerMixin):
             ResearchPaper object or None
         """
         try:
-            root = ET.fromstring(xml_content)
+            root = etree.fromstring(xml_content, NIH_XML_PARSER)
             article = root.find(".//PubmedArticle")
             
             if article is None:
                 return None
             
+            return self._parse_article_element(article, pmid)
+            
+        except Exception as e:
+            self.logger.error(
+                "Error parsing PubMed XML",
+                error=str(e),
+                pmid=pmid
+            )
+            return None
+    
+    def _parse_article_element(
+        self,
+        article: etree._Element,
+        pmid: Optional[str] = None
+    ) -> Optional[ResearchPaper]:
+        """
+        Parse a single PubmedArticle element.
+        
+        Args:
+            article: PubmedArticle element
+            pmid: PubMed ID, read from the article when not given
+            
+        Returns:
+            ResearchPaper object or None
+        """
+        try:
             # Extract article information
-            medline_citation = article.find(".//MedlineCitation")
-            if medline_citation is None:
+            medline_citations = self._XP_MEDLINE_CITATION(article)
+            if not medline_citations:
                 return None
+            medline_citation = medline_citations[0]
+            
+            if pmid is None:
+                pmids = self._XP_PMID(medline_citation)
+                if not pmids:
+                    return None
+                pmid = str(pmids[0])
             
             # Get title
-            title_elem = medline_citation.find(".//ArticleTitle")
-            title = title_elem.text if title_elem is not None else "No title available"
+            title = self._first_text(self._XP_TITLE(medline_citation), "No title available")
             
             # Get authors
             authors = []
-            author_list = medline_citation.find(".//AuthorList")
-            if author_list is not None:
-                for author in author_list.findall("Author"):
-                    last_name = author.find("LastName")
-                    fore_name = author.find("ForeName")
-                    if last_name is not None and fore_name is not None:
-                        authors.append(f"{fore_name.text} {last_name.text}")
-                    elif last_name is not None:
-                        authors.append(last_name.text)
+            for author in self._XP_AUTHORS(medline_citation):
+                last_name = author.findtext("LastName")
+                fore_name = author.findtext("ForeName")
+                if last_name is not None and fore_name is not None:
+                    authors.append(f"{fore_name} {last_name}")
+                elif last_name is not None:
+                    authors.append(last_name)
             
             # Get abstract
-            abstract_elem = medline_citation.find(".//Abstract/AbstractText")
-            abstract = abstract_elem.text if abstract_elem is not None else "No abstract available"
+            abstract = self._first_text(self._XP_ABSTRACT(medline_citation), "No abstract available")
             
             # Get journal
-            journal_elem = medline_citation.find(".//Journal/Title")
-            journal = journal_elem.text if journal_elem is not None else "Unknown journal"
+            journal = self._first_text(self._XP_JOURNAL(medline_citation), "Unknown journal")
             
             # Get publication date
             pub_date = self._extract_publication_date(medline_citation)
             
             # Get DOI
-            doi = None
-            article_id_list = article.find(".//ArticleIdList")
-            if article_id_list is not None:
-                for article_id in article_id_list.findall("ArticleId"):
-                    if article_id.get("IdType") == "doi":
-                        doi = article_id.text
-                        break
+            dois = self._XP_DOI(article)
+            doi = str(dois[0]) if dois else None
             
             # Get keywords
-            keywords = []
-            keyword_list = medline_citation.find(".//KeywordList")
-            if keyword_list is not None:
-                for keyword in keyword_list.findall("Keyword"):
-                    if keyword.text:
-                        keywords.append(keyword.text)
+            keywords = [str(keyword) for keyword in self._XP_KEYWORDS(medline_citation)]
             
             return ResearchPaper(
                 id=f"PMID{pmid}",
@@ -297,7 +441,7 @@ class NIHClient(LoggerMixin):
             
         except Exception as e:
             self.logger.error(
-                "Error parsing PubMed XML",
+                "Error parsing PubMed article",
                 error=str(e),
                 pmid=pmid
             )
@@ -313,23 +457,31 @@ class NIHClient(LoggerMixin):
         Returns:
             Publication date
         """
+        # Only read the clock when a date part is actually missing
         try:
             # Try to get publication date
-            pub_date_elem = medline_citation.find(".//PubDate")
-            if pub_date_elem is not None:
-                year_elem = pub_date_elem.find("Year")
-                month_elem = pub_date_elem.find("Month")
-                day_elem = pub_date_elem.find("Day")
+            pub_dates = self._XP_PUB_DATE(medline_citation)
+            if pub_dates:
+                pub_date_elem = pub_dates[0]
+                year_text = pub_date_elem.findtext("Year")
+                month_text = pub_date_elem.findtext("Month")
+                day_text = pub_date_elem.findtext("Day")
                 
-                year = int(year_elem.text) if year_elem is not None else datetime.utcnow().year
-                month = int(month_elem.text) if month_elem is not None else 1
-                day = int(day_elem.text) if day_elem is not None else 1
+                year = int(year_text) if year_text is not None else datetime.utcnow().year
+                month = int(month_text) if month_text is not None else 1
+                day = int(day_text) if day_text is not None else 1
                 
                 return datetime(year, month, day)
             
-            # Fallback to current date
-            return datetime.utcnow()
-            
         except Exception as e:
             self.logger.warning(f"Error extracting publication date: {e}")
-            return datetime.utcnow() 
\ No newline at end of file
+        
+        # Fallback to current date
+        return datetime.utcnow()
+    
+    @staticmethod
+    def _first_text(elements: List[etree._Element], default: str) -> str:
+        """Return the text of the first matched element, or default if none matched."""
+        if elements and elements[0].text is not None:
+            return elements[0].text
+        return default
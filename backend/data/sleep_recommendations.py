@@ -2,12 +2,182 @@
 Sleep recommendations data client for the Sleep Science Explainer Bot.
 """
 
+import re
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-import json
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Dict, Any, Set, Tuple
 
 from backend.core.logging import LoggerMixin
 
+# Word tokens used for the recommendation search index
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Recommendations from each source, built once at import and shared
+# read-only, down to the nested records, by every client
+RECOMMENDATIONS: Mapping[str, Any] = _freeze({
+    "bryan_johnson": {
+        "name": "Bryan Johnson - Blueprint Protocol",
+        "source": "bryan_johnson",
+        "recommendations": [
+            {
+                "id": "bj_001",
+                "title": "Sleep Schedule Optimization",
+                "content": "Maintain a consistent sleep schedule with 8-9 hours of sleep per night. Go to bed between 9-10 PM and wake up between 5-6 AM to align with natural circadian rhythms.",
+                "category": "sleep_schedule",
+                "priority": "high"
+            },
+            {
+                "id": "bj_002",
+                "title": "Sleep Environment",
+                "content": "Keep bedroom temperature between 65-67°F (18-19°C), use blackout curtains, and eliminate all light sources. Consider using a sleep mask and earplugs for optimal conditions.",
+                "category": "sleep_environment",
+                "priority": "high"
+            },
+            {
+                "id": "bj_003",
+                "title": "Pre-Sleep Routine",
+                "content": "Avoid screens 2-3 hours before bed, engage in relaxing activities like reading or meditation, and avoid caffeine after 2 PM.",
+                "category": "sleep_hygiene",
+                "priority": "medium"
+            },
+            {
+                "id": "bj_004",
+                "title": "Sleep Tracking",
+                "content": "Use sleep tracking devices to monitor sleep quality, duration, and patterns. Aim for consistent deep sleep and REM cycles.",
+                "category": "sleep_monitoring",
+                "priority": "medium"
+            }
+        ]
+    },
+    "andrew_huberman": {
+        "name": "Andrew Huberman - Huberman Lab",
+        "source": "andrew_huberman",
+        "recommendations": [
+            {
+                "id": "ah_001",
+                "title": "Morning Light Exposure",
+                "content": "Get 10-30 minutes of bright light exposure within 30-60 minutes of waking up. This helps set your circadian rhythm and improves sleep quality later.",
+                "category": "circadian_rhythm",
+                "priority": "high"
+            },
+            {
+                "id": "ah_002",
+                "title": "Evening Light Management",
+                "content": "Avoid bright light exposure 2-3 hours before bed. Use dim, warm lighting and consider blue light blocking glasses if using screens.",
+                "category": "circadian_rhythm",
+                "priority": "high"
+            },
+            {
+                "id": "ah_003",
+                "title": "Temperature Regulation",
+                "content": "Your body temperature naturally drops 2-3 degrees before sleep. Take a hot bath or shower 1-2 hours before bed to facilitate this drop.",
+                "category": "sleep_physiology",
+                "priority": "medium"
+            },
+            {
+                "id": "ah_004",
+                "title": "Caffeine Timing",
+                "content": "Avoid caffeine 8-10 hours before bed. Caffeine has a half-life of 5-6 hours, so it can significantly impact sleep quality.",
+                "category": "sleep_hygiene",
+                "priority": "high"
+            },
+            {
+                "id": "ah_005",
+                "title": "Exercise Timing",
+                "content": "Exercise in the morning or early afternoon. Avoid intense exercise within 3-4 hours of bedtime as it can raise body temperature and delay sleep.",
+                "category": "exercise",
+                "priority": "medium"
+            }
+        ]
+    },
+    "eightsleep": {
+        "name": "EightSleep - Sleep Optimization",
+        "source": "eightsleep",
+        "recommendations": [
+            {
+                "id": "es_001",
+                "title": "Temperature Control",
+                "content": "Use temperature regulation technology to maintain optimal sleep temperature. Cool your body to 65-67°F during sleep for better quality rest.",
+                "category": "sleep_environment",
+                "priority": "high"
+            },
+            {
+                "id": "es_002",
+                "title": "Sleep Stages Optimization",
+                "content": "Focus on getting adequate deep sleep (20-25% of total sleep) and REM sleep (20-25% of total sleep). These stages are crucial for recovery and cognitive function.",
+                "category": "sleep_stages",
+                "priority": "high"
+            },
+            {
+                "id": "es_003",
+                "title": "Heart Rate Variability",
+                "content": "Monitor heart rate variability (HRV) as it's a key indicator of recovery and sleep quality. Higher HRV generally indicates better sleep and recovery.",
+                "category": "sleep_monitoring",
+                "priority": "medium"
+            },
+            {
+                "id": "es_004",
+                "title": "Sleep Consistency",
+                "content": "Maintain consistent sleep and wake times, even on weekends. This helps regulate your circadian rhythm and improves overall sleep quality.",
+                "category": "sleep_schedule",
+                "priority": "high"
+            }
+        ]
+    },
+    "cdc": {
+        "name": "CDC - Sleep Guidelines",
+        "source": "cdc",
+        "recommendations": [
+            {
+                "id": "cdc_001",
+                "title": "Sleep Duration Guidelines",
+                "content": "Adults should get 7 or more hours of sleep per night. Teenagers need 8-10 hours, and school-age children need 9-12 hours.",
+                "category": "sleep_duration",
+                "priority": "high"
+            },
+            {
+                "id": "cdc_002",
+                "title": "Sleep Hygiene Practices",
+                "content": "Go to bed and wake up at the same time every day, including weekends. Make sure your bedroom is quiet, dark, and at a comfortable temperature.",
+                "category": "sleep_hygiene",
+                "priority": "high"
+            },
+            {
+                "id": "cdc_003",
+                "title": "Electronic Device Management",
+                "content": "Remove electronic devices from the bedroom, including TVs, computers, and smartphones. The light from these devices can interfere with sleep.",
+                "category": "sleep_environment",
+                "priority": "medium"
+            },
+            {
+                "id": "cdc_004",
+                "title": "Physical Activity",
+                "content": "Be physically active during the day, which can help you fall asleep more easily at night. However, avoid vigorous exercise close to bedtime.",
+                "category": "exercise",
+                "priority": "medium"
+            },
+            {
+                "id": "cdc_005",
+                "title": "Diet and Sleep",
+                "content": "Avoid large meals, caffeine, and alcohol before bedtime. These can interfere with your ability to fall asleep and stay asleep.",
+                "category": "diet",
+                "priority": "medium"
+            }
+        ]
+    }
+})
+
 
 class SleepRecommendationsClient(LoggerMixin):
     """
@@ -25,166 +195,76 @@ class SleepRecommendationsClient(LoggerMixin):
         self.logger.info("Initializing SleepRecommendationsClient")
         
         # Load recommendations data
-        self.recommendations = self._load_recommendations()
+        self.recommendations = RECOMMENDATIONS
+        self._build_indexes()
         
         self.logger.info("SleepRecommendationsClient initialized successfully")
     
-    def _load_recommendations(self) -> Dict[str, Any]:
-        """Load sleep recommendations from various sources."""
-        return {
-            "bryan_johnson": {
-                "name": "Bryan Johnson - Blueprint Protocol",
-                "source": "bryan_johnson",
-                "recommendations": [
-                    {
-                        "id": "bj_001",
-                        "title": "Sleep Schedule Optimization",
-                        "content": "Maintain a consistent sleep schedule with 8-9 hours of sleep per night. Go to bed between 9-10 PM and wake up between 5-6 AM to align with natural circadian rhythms.",
-                        "category": "sleep_schedule",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "bj_002",
-                        "title": "Sleep Environment",
-                        "content": "Keep bedroom temperature between 65-67°F (18-19°C), use blackout curtains, and eliminate all light sources. Consider using a sleep mask and earplugs for optimal conditions.",
-                        "category": "sleep_environment",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "bj_003",
-                        "title": "Pre-Sleep Routine",
-                        "content": "Avoid screens 2-3 hours before bed, engage in relaxing activities like reading or meditation, and avoid caffeine after 2 PM.",
-                        "category": "sleep_hygiene",
-                        "priority": "medium"
-                    },
-                    {
-                        "id": "bj_004",
-                        "title": "Sleep Tracking",
-                        "content": "Use sleep tracking devices to monitor sleep quality, duration, and patterns. Aim for consistent deep sleep and REM cycles.",
-                        "category": "sleep_monitoring",
-                        "priority": "medium"
-                    }
-                ]
-            },
-            "andrew_huberman": {
-                "name": "Andrew Huberman - Huberman Lab",
-                "source": "andrew_huberman",
-                "recommendations": [
-                    {
-                        "id": "ah_001",
-                        "title": "Morning Light Exposure",
-                        "content": "Get 10-30 minutes of bright light exposure within 30-60 minutes of waking up. This helps set your circadian rhythm and improves sleep quality later.",
-                        "category": "circadian_rhythm",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "ah_002",
-                        "title": "Evening Light Management",
-                        "content": "Avoid bright light exposure 2-3 hours before bed. Use dim, warm lighting and consider blue light blocking glasses if using screens.",
-                        "category": "circadian_rhythm",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "ah_003",
-                        "title": "Temperature Regulation",
-                        "content": "Your body temperature naturally drops 2-3 degrees before sleep. Take a hot bath or shower 1-2 hours before bed to facilitate this drop.",
-                        "category": "sleep_physiology",
-                        "priority": "medium"
-                    },
-                    {
-                        "id": "ah_004",
-                        "title": "Caffeine Timing",
-                        "content": "Avoid caffeine 8-10 hours before bed. Caffeine has a half-life of 5-6 hours, so it can significantly impact sleep quality.",
-                        "category": "sleep_hygiene",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "ah_005",
-                        "title": "Exercise Timing",
-                        "content": "Exercise in the morning or early afternoon. Avoid intense exercise within 3-4 hours of bedtime as it can raise body temperature and delay sleep.",
-                        "category": "exercise",
-                        "priority": "medium"
-                    }
-                ]
-            },
-            "eightsleep": {
-                "name": "EightSleep - Sleep Optimization",
-                "source": "eightsleep",
-                "recommendations": [
-                    {
-                        "id": "es_001",
-                        "title": "Temperature Control",
-                        "content": "Use temperature regulation technology to maintain optimal sleep temperature. Cool your body to 65-67°F during sleep for better quality rest.",
-                        "category": "sleep_environment",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "es_002",
-                        "title": "Sleep Stages Optimization",
-                        "content": "Focus on getting adequate deep sleep (20-25% of total sleep) and REM sleep (20-25% of total sleep). These stages are crucial for recovery and cognitive function.",
-                        "category": "sleep_stages",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "es_003",
-                        "title": "Heart Rate Variability",
-                        "content": "Monitor heart rate variability (HRV) as it's a key indicator of recovery and sleep quality. Higher HRV generally indicates better sleep and recovery.",
-                        "category": "sleep_monitoring",
-                        "priority": "medium"
-                    },
-                    {
-                        "id": "es_004",
-                        "title": "Sleep Consistency",
-                        "content": "Maintain consistent sleep and wake times, even on weekends. This helps regulate your circadian rhythm and improves overall sleep quality.",
-                        "category": "sleep_schedule",
-                        "priority": "high"
-                    }
-                ]
-            },
-            "cdc": {
-                "name": "CDC - Sleep Guidelines",
-                "source": "cdc",
-                "recommendations": [
-                    {
-                        "id": "cdc_001",
-                        "title": "Sleep Duration Guidelines",
-                        "content": "Adults should get 7 or more hours of sleep per night. Teenagers need 8-10 hours, and school-age children need 9-12 hours.",
-                        "category": "sleep_duration",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "cdc_002",
-                        "title": "Sleep Hygiene Practices",
-                        "content": "Go to bed and wake up at the same time every day, including weekends. Make sure your bedroom is quiet, dark, and at a comfortable temperature.",
-                        "category": "sleep_hygiene",
-                        "priority": "high"
-                    },
-                    {
-                        "id": "cdc_003",
-                        "title": "Electronic Device Management",
-                        "content": "Remove electronic devices from the bedroom, including TVs, computers, and smartphones. The light from these devices can interfere with sleep.",
-                        "category": "sleep_environment",
-                        "priority": "medium"
-                    },
-                    {
-                        "id": "cdc_004",
-                        "title": "Physical Activity",
-                        "content": "Be physically active during the day, which can help you fall asleep more easily at night. However, avoid vigorous exercise close to bedtime.",
-                        "category": "exercise",
-                        "priority": "medium"
-                    },
-                    {
-                        "id": "cdc_005",
-                        "title": "Diet and Sleep",
-                        "content": "Avoid large meals, caffeine, and alcohol before bedtime. These can interfere with your ability to fall asleep and stay asleep.",
-                        "category": "diet",
-                        "priority": "medium"
-                    }
-                ]
-            }
-        }
+    def _build_indexes(self) -> None:
+        """
+        Precompute lookup and search structures over the static recommendations.
+        
+        Each recommendation is stored once, read-only, in its merged response
+        shape and indexed by ID and category, alongside its lowercased
+        searchable fields and an inverted index from word tokens to
+        recommendation keys. Public methods hand out copies of these records.
+        """
+        self._recs_by_key: Dict[Tuple[str, str], Mapping[str, Any]] = {}
+        self._keys_by_source: Dict[str, List[Tuple[str, str]]] = {}
+        self._haystacks: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self._token_index: Dict[str, Set[Tuple[str, str]]] = {}
+        self._by_id: Dict[str, Mapping[str, Any]] = {}
+        self._by_category: Dict[str, List[Mapping[str, Any]]] = {}
+        
+        for source, source_data in self.recommendations.items():
+            keys = self._keys_by_source.setdefault(source, [])
+            for rec in source_data["recommendations"]:
+                key = (source, rec["id"])
+                keys.append(key)
+                merged = MappingProxyType({
+                    **rec,
+                    "source_name": source_data["name"],
+                    "source": source_data["source"]
+                })
+                self._recs_by_key[key] = merged
+                # First occurrence wins, matching the old nested scan
+                self._by_id.setdefault(rec["id"], merged)
+                self._by_category.setdefault(rec["category"], []).append(merged)
+                fields = (rec["title"].lower(), rec["content"].lower(), rec["category"].lower())
+                self._haystacks[key] = fields
+                for field in fields:
+                    for token in TOKEN_PATTERN.findall(field):
+                        self._token_index.setdefault(token, set()).add(key)
+    
+    def _keys_containing(self, query_token: str) -> Set[Tuple[str, str]]:
+        """Return keys of recommendations with a token containing query_token."""
+        keys: Set[Tuple[str, str]] = set()
+        for token, token_keys in self._token_index.items():
+            if query_token in token:
+                keys |= token_keys
+        return keys
+    
+    def _candidate_keys(self, query_lower: str) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Narrow a query to recommendations that could contain it.
+        
+        Any field containing the query must contain each of its word tokens
+        inside one of the field's own tokens, so intersecting those posting
+        lists gives a superset of the matches.
+        
+        Returns:
+            Candidate keys, or None if the query has no word tokens
+        """
+        query_tokens = TOKEN_PATTERN.findall(query_lower)
+        if not query_tokens:
+            return None
+        
+        candidates = self._keys_containing(query_tokens[0])
+        for query_token in query_tokens[1:]:
+            candidates = candidates & self._keys_containing(query_token)
+        return candidates
     
-    async def search_recommendations(
+    def search_recommendations(
         self,
         query: str,
         max_results: int = 10,
@@ -210,34 +290,26 @@ class SleepRecommendationsClient(LoggerMixin):
         
         results = []
         query_lower = query.lower()
+        candidates = self._candidate_keys(query_lower)
         
         # Determine which sources to search
         sources_to_search = sources or list(self.recommendations.keys())
         
         for source in sources_to_search:
-            if source not in self.recommendations:
-                continue
+            for key in self._keys_by_source.get(source, ()):
+                if candidates is not None and key not in candidates:
+                    continue
                 
-            source_data = self.recommendations[source]
-            
-            for rec in source_data["recommendations"]:
-                # Simple keyword matching
-                if (query_lower in rec["title"].lower() or 
-                    query_lower in rec["content"].lower() or
-                    query_lower in rec["category"].lower()):
-                    
-                    results.append({
-                        **rec,
-                        "source_name": source_data["name"],
-                        "source": source_data["source"]
-                    })
+                # Confirm the substring match against the precomputed fields
+                if any(query_lower in field for field in self._haystacks[key]):
+                    results.append(dict(self._recs_by_key[key]))
                     
                     if len(results) >= max_results:
-                        break
+                        return results
         
-        return results[:max_results]
+        return results
     
-    async def get_recommendations_by_category(
+    def get_recommendations_by_category(
         self,
         category: str,
         source: Optional[str] = None
@@ -254,35 +326,19 @@ class SleepRecommendationsClient(LoggerMixin):
         """
         self.logger.info("Getting recommendations by category", category=category, source=source)
         
-        results = []
-        sources_to_search = [source] if source else list(self.recommendations.keys())
-        
-        for source_name in sources_to_search:
-            if source_name not in self.recommendations:
-                continue
-                
-            source_data = self.recommendations[source_name]
-            
-            for rec in source_data["recommendations"]:
-                if rec["category"] == category:
-                    results.append({
-                        **rec,
-                        "source_name": source_data["name"],
-                        "source": source_data["source"]
-                    })
-        
-        return results
+        results = self._by_category.get(category, ())
+        return [dict(rec) for rec in results if not source or rec["source"] == source]
     
-    async def get_all_recommendations(self) -> Dict[str, Any]:
+    def get_all_recommendations(self) -> Mapping[str, Any]:
         """
         Get all recommendations organized by source.
         
         Returns:
-            Dictionary of all recommendations
+            Read-only mapping of all recommendations
         """
         return self.recommendations
     
-    async def get_recommendation_by_id(self, rec_id: str) -> Optional[Dict[str, Any]]:
+    def get_recommendation_by_id(self, rec_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific recommendation by ID.
         
@@ -292,13 +348,11 @@ class SleepRecommendationsClient(LoggerMixin):
         Returns:
             Recommendation data or None
         """
-        for source_data in self.recommendations.values():
-            for rec in source_data["recommendations"]:
-                if rec["id"] == rec_id:
-                    return {
-                        **rec,
-                        "source_name": source_data["name"],
-                        "source": source_data["source"]
-                    }
-        
-        return None 
\ No newline at end of file
+        recommendation = self._by_id.get(rec_id)
+        return dict(recommendation) if recommendation is not None else None
+
+
+@lru_cache(maxsize=1)
+def get_sleep_recommendations_client() -> SleepRecommendationsClient:
+    """Return the shared recommendations client, building its indexes on first use."""
+    return SleepRecommendationsClient()
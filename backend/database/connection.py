@@ -2,7 +2,13 @@
 Database connection and session management for the Sleep Science Explainer Bot.
 """
 
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator
+
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 
@@ -12,6 +18,39 @@ from backend.database.models import Base
 
 logger = get_logger(__name__)
 
+# Async drivers used in place of the synchronous ones from DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT clauses
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def get_connect_args(url: URL) -> Dict[str, Any]:
+    """
+    Driver arguments enabling TCP keepalives on PostgreSQL connections.
+    
+    Idle pooled connections are otherwise dropped silently by firewalls and
+    load balancers, and only discovered on the next checkout.
+    """
+    if url.get_backend_name() != "postgresql":
+        return {}
+    if url.get_driver_name() == "asyncpg":
+        return {"server_settings": {"tcp_keepalives_idle": str(settings.database_keepalives_idle)}}
+    return {"keepalives": 1, "keepalives_idle": settings.database_keepalives_idle}
+
+
+def get_async_database_url(database_url: str) -> URL:
+    """Translate a synchronous database URL to its async driver equivalent."""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
 
 class DatabaseManager:
     """Database connection and session manager."""
@@ -20,18 +59,27 @@ class DatabaseManager:
         """Initialize the database manager."""
         self.engine = None
         self.SessionLocal = None
+        self.async_engine = None
+        self.AsyncSessionLocal = None
         self._setup_database()
     
     def _setup_database(self):
         """Setup database engine and session factory."""
         try:
             # Create database engine
+            database_url = make_url(settings.database_url)
             self.engine = create_engine(
-                settings.database_url,
+                database_url,
                 poolclass=QueuePool,
                 pool_size=settings.database_pool_size,
                 max_overflow=settings.database_max_overflow,
                 pool_pre_ping=True,
+                pool_recycle=settings.database_pool_recycle,
+                pool_timeout=settings.database_pool_timeout,
+                # Reuse the most recently returned connection so a small
+                # warm set serves steady traffic and extras can idle out
+                pool_use_lifo=settings.database_pool_use_lifo,
+                connect_args=get_connect_args(database_url),
                 echo=settings.debug
             )
             
@@ -42,6 +90,25 @@ class DatabaseManager:
                 bind=self.engine
             )
             
+            # Create async engine and session factory for non-blocking queries
+            async_database_url = get_async_database_url(settings.database_url)
+            self.async_engine = create_async_engine(
+                async_database_url,
+                pool_size=settings.database_pool_size,
+                max_overflow=settings.database_max_overflow,
+                pool_pre_ping=True,
+                pool_recycle=settings.database_pool_recycle,
+                pool_timeout=settings.database_pool_timeout,
+                pool_use_lifo=settings.database_pool_use_lifo,
+                connect_args=get_connect_args(async_database_url),
+                echo=settings.debug
+            )
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.async_engine,
+                autoflush=False,
+                expire_on_commit=False
+            )
+            
             logger.info("Database connection established successfully")
             
         except Exception as e:
@@ -57,17 +124,65 @@ class DatabaseManager:
             logger.error(f"Failed to create database tables: {e}")
             raise
     
+    async def async_ping(self) -> None:
+        """Check out a pooled async connection and run a trivial query on it."""
+        async with self.async_session() as session:
+            await session.execute(text("SELECT 1"))
+    
     def get_session(self) -> Session:
         """Get a database session."""
         if not self.SessionLocal:
             raise RuntimeError("Database not initialized")
         return self.SessionLocal()
     
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """
+        Provide a transactional session scope.
+        
+        Commits when the block exits cleanly, rolls back on error and
+        always returns the connection to the pool.
+        """
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    @asynccontextmanager
+    async def async_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Provide a transactional async session scope.
+        
+        Mirrors session() for handlers that must not block the event loop.
+        """
+        if not self.AsyncSessionLocal:
+            raise RuntimeError("Database not initialized")
+        session = self.AsyncSessionLocal()
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+    
     def close(self):
         """Close database connections."""
         if self.engine:
             self.engine.dispose()
             logger.info("Database connections closed")
+    
+    async def async_close(self):
+        """Close async database connections."""
+        if self.async_engine:
+            await self.async_engine.dispose()
+            logger.info("Async database connections closed")
 
 
 # Global database manager instance
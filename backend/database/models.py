@@ -2,14 +2,39 @@
 Database models for the Sleep Science Explainer Bot.
 """
 
+import zlib
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON, Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
 
+# Chat text compresses several-fold; level 3 keeps the CPU cost low
+TEXT_COMPRESSION_LEVEL = 3
+
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column."""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return zlib.compress(value.encode("utf-8"), TEXT_COMPRESSION_LEVEL)
+    
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        try:
+            return zlib.decompress(value).decode("utf-8")
+        except zlib.error:
+            # Rows written before compression hold plain UTF-8
+            return bytes(value).decode("utf-8")
+
 
 class User(Base):
     """User model for tracking user interactions."""
@@ -17,7 +42,7 @@ class User(Base):
     
     id = Column(String(36), primary_key=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow, index=True)
     total_interactions = Column(Integer, default=0)
     
     # Relationships
@@ -30,7 +55,7 @@ class Conversation(Base):
     __tablename__ = "conversations"
     
     id = Column(String(36), primary_key=True)
-    user_id = Column(String(36), ForeignKey("users.id"))
+    user_id = Column(String(36), ForeignKey("users.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
     title = Column(String(255), nullable=True)
@@ -38,12 +63,23 @@ class Conversation(Base):
     
     # Relationships
     user = relationship("User", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", order_by="Message.timestamp")
+    # A conversation is almost always read together with its messages, so
+    # load them in one batched IN query rather than one query per conversation
+    messages = relationship(
+        "Message",
+        back_populates="conversation",
+        order_by="Message.timestamp",
+        lazy="selectin"
+    )
 
 
 class Message(Base):
     """Message model for storing individual chat messages."""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Matches the conversation lookup and its order_by on timestamp
+        Index("ix_messages_conversation_id_timestamp", "conversation_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     conversation_id = Column(String(36), ForeignKey("conversations.id"))
@@ -59,13 +95,19 @@ class Message(Base):
 class Interaction(Base):
     """Interaction model for analytics tracking."""
     __tablename__ = "interactions"
+    __table_args__ = (
+        Index("ix_interactions_timestamp_conversation_id", "timestamp", "conversation_id"),
+        Index("ix_interactions_ts_topic", "timestamp", "topic"),
+        Index("ix_interactions_user_ts", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String(36), ForeignKey("users.id"))
-    conversation_id = Column(String(36), ForeignKey("conversations.id"))
-    message = Column(Text)
-    response = Column(Text)
-    topic = Column(String(100))
+    conversation_id = Column(String(36), ForeignKey("conversations.id"), index=True)
+    # Kept for reference only; analytics never read them back
+    message = Column(CompressedText)
+    response = Column(CompressedText)
+    topic = Column(String(100), index=True)
     message_length = Column(Integer)
     response_length = Column(Integer)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -75,6 +117,19 @@ class Interaction(Base):
     user = relationship("User", back_populates="interactions")
 
 
+class ConversationSummary(Base):
+    """Running per-conversation totals, updated as interactions are logged."""
+    __tablename__ = "conversation_summaries"
+    
+    conversation_id = Column(String(36), ForeignKey("conversations.id"), primary_key=True)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=True)
+    total_messages = Column(Integer, default=0)
+    sum_msg_len = Column(Integer, default=0)
+    sum_resp_len = Column(Integer, default=0)
+    start_time = Column(DateTime)
+    end_time = Column(DateTime, index=True)
+
+
 class ResearchPaper(Base):
     """Research paper model for caching paper data."""
     __tablename__ = "research_papers"
@@ -84,7 +139,7 @@ class ResearchPaper(Base):
     authors = Column(JSON)  # List of author names
     abstract = Column(Text)
     journal = Column(String(255))
-    publication_date = Column(DateTime)
+    publication_date = Column(DateTime, index=True)
     doi = Column(String(100), nullable=True)
     pmid = Column(String(20), nullable=True)
     keywords = Column(JSON)  # List of keywords
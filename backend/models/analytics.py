@@ -2,12 +2,35 @@
 Analytics service for the Sleep Science Explainer Bot.
 """
 
+import asyncio
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-import json
+from functools import lru_cache
+from time import monotonic
+from typing import Awaitable, Callable, Dict, List, Optional, Any
+
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import delete, desc, distinct, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.core.logging import LoggerMixin
 from backend.core.config import settings
+from backend.database.connection import UPSERT_INSERTS, db_manager
+from backend.database.models import ConversationSummary, Interaction, User
+
+# Slow-moving dashboard aggregates are cached in Redis, shared by all
+# workers, for this many seconds
+ANALYTICS_CACHE_TTL_SECONDS = 300
+ANALYTICS_CACHE_PREFIX = "analytics:cache:"
+# How long to skip the shared cache after Redis fails
+ANALYTICS_CACHE_RETRY_SECONDS = 30.0
+
+# Logged interactions are written in batches: every flush interval
+# (seconds), or sooner once this many are pending
+INTERACTION_FLUSH_INTERVAL = 0.5
+INTERACTION_FLUSH_SIZE = 200
 
 
 class AnalyticsService(LoggerMixin):
@@ -25,10 +48,26 @@ class AnalyticsService(LoggerMixin):
         """Initialize the analytics service."""
         self.logger.info("Initializing AnalyticsService")
         
-        # In-memory storage for analytics (in production, this would be in a database)
-        self.interactions: List[Dict[str, Any]] = []
-        self.topic_counts: Dict[str, int] = {}
-        self.user_sessions: Dict[str, Dict[str, Any]] = {}
+        # Interactions live in the database; aggregates are computed there
+        # against the indexed interactions table rather than in Python
+        
+        # Shared result cache for the dashboard aggregates
+        self.cache = redis.from_url(
+            settings.redis_url,
+            password=settings.redis_password,
+            socket_connect_timeout=0.25,
+            socket_timeout=0.25,
+        )
+        self.cache_retry_at = 0.0
+        
+        # Interactions waiting for the next batched insert. Bounded so an
+        # unreachable database drops the oldest rows instead of growing
+        # memory without limit
+        self._pending: "deque[Dict[str, Any]]" = deque(
+            maxlen=settings.analytics_max_pending_interactions
+        )
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional["asyncio.Task[None]"] = None
         
         self.logger.info("AnalyticsService initialized successfully")
     
@@ -52,35 +91,28 @@ class AnalyticsService(LoggerMixin):
             topic: Topic category
             additional_data: Additional analytics data
         """
-        interaction = {
+        if len(self._pending) == self._pending.maxlen:
+            self.logger.warning(
+                "Interaction buffer full, dropping oldest",
+                maxlen=self._pending.maxlen
+            )
+        
+        self._pending.append({
             "user_id": user_id,
             "conversation_id": conversation_id,
             "message": message,
             "response": response,
             "topic": topic,
-            "timestamp": datetime.utcnow(),
             "message_length": len(message),
             "response_length": len(response),
+            "timestamp": datetime.utcnow(),
             "additional_data": additional_data or {}
-        }
-        
-        self.interactions.append(interaction)
+        })
         
-        # Update topic counts
-        self.topic_counts[topic] = self.topic_counts.get(topic, 0) + 1
-        
-        # Update user session
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {
-                "first_seen": datetime.utcnow(),
-                "last_seen": datetime.utcnow(),
-                "total_interactions": 0,
-                "topics": set()
-            }
-        
-        self.user_sessions[user_id]["last_seen"] = datetime.utcnow()
-        self.user_sessions[user_id]["total_interactions"] += 1
-        self.user_sessions[user_id]["topics"].add(topic)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_forever())
+        if len(self._pending) >= INTERACTION_FLUSH_SIZE:
+            await self.flush()
         
         self.logger.debug(
             "Logged interaction",
@@ -89,6 +121,147 @@ class AnalyticsService(LoggerMixin):
             topic=topic
         )
     
+    async def flush(self) -> None:
+        """
+        Write pending interactions, user counters and conversation summaries.
+        
+        The batch goes out as one executemany insert plus one upsert per
+        user and per conversation, committed together. On failure the batch is put
+        back so the next flush retries it.
+        """
+        async with self._flush_lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            if not batch:
+                return
+            
+            # Collapse the batch to one summary row per conversation so
+            # the upsert never touches the same row twice
+            summaries: Dict[str, Dict[str, Any]] = {}
+            for row in batch:
+                summary = summaries.get(row["conversation_id"])
+                if summary is None:
+                    summaries[row["conversation_id"]] = {
+                        "conversation_id": row["conversation_id"],
+                        "user_id": row["user_id"],
+                        "total_messages": 1,
+                        "sum_msg_len": row["message_length"],
+                        "sum_resp_len": row["response_length"],
+                        "start_time": row["timestamp"],
+                        "end_time": row["timestamp"]
+                    }
+                else:
+                    summary["total_messages"] += 1
+                    summary["sum_msg_len"] += row["message_length"]
+                    summary["sum_resp_len"] += row["response_length"]
+                    summary["end_time"] = row["timestamp"]
+            
+            # Likewise one counter update per user
+            users: Dict[str, Dict[str, Any]] = {}
+            for row in batch:
+                user = users.get(row["user_id"])
+                if user is None:
+                    users[row["user_id"]] = {
+                        "id": row["user_id"],
+                        "created_at": row["timestamp"],
+                        "last_seen": row["timestamp"],
+                        "total_interactions": 1
+                    }
+                else:
+                    user["last_seen"] = row["timestamp"]
+                    user["total_interactions"] += 1
+            
+            try:
+                async with db_manager.async_session() as session:
+                    dialect_name = session.bind.dialect.name
+                    # Users first, so the interaction foreign keys resolve
+                    await session.execute(
+                        self._user_upsert(dialect_name),
+                        list(users.values())
+                    )
+                    await session.execute(insert(Interaction), batch)
+                    await session.execute(
+                        self._summary_upsert(dialect_name),
+                        list(summaries.values())
+                    )
+            except BaseException:
+                # Including cancellation, e.g. close() stopping the flusher
+                self._pending = deque(
+                    [*batch, *self._pending],
+                    maxlen=self._pending.maxlen
+                )
+                raise
+        
+        self.logger.debug("Flushed interactions", count=len(batch))
+    
+    async def _flush_forever(self) -> None:
+        """Flush pending interactions on a fixed interval, off the request path."""
+        while True:
+            await asyncio.sleep(INTERACTION_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(
+                    "Failed to flush interactions",
+                    error=str(e),
+                    pending=len(self._pending)
+                )
+    
+    async def close(self) -> None:
+        """Stop the background flusher, write anything still pending and close the cache."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        await self.cache.aclose()
+    
+    @staticmethod
+    def _user_upsert(dialect_name: str):
+        """
+        Build an upsert adding a batch's interaction counts to users.
+        
+        The increment happens in SQL, so concurrent workers can't lose
+        each other's updates the way a read-modify-write would.
+        
+        Args:
+            dialect_name: Database dialect the statement is compiled for
+            
+        Returns:
+            INSERT ... ON CONFLICT DO UPDATE statement, executed with one
+            parameter set per user
+        """
+        stmt = UPSERT_INSERTS[dialect_name](User.__table__)
+        return stmt.on_conflict_do_update(
+            index_elements=[User.id],
+            set_={
+                "total_interactions": User.total_interactions + stmt.excluded.total_interactions,
+                "last_seen": stmt.excluded.last_seen
+            }
+        )
+    
+    @staticmethod
+    def _summary_upsert(dialect_name: str):
+        """
+        Build an upsert adding a batch of interactions to conversation summaries.
+        
+        Args:
+            dialect_name: Database dialect the statement is compiled for
+            
+        Returns:
+            INSERT ... ON CONFLICT DO UPDATE statement, executed with one
+            parameter set per conversation
+        """
+        stmt = UPSERT_INSERTS[dialect_name](ConversationSummary)
+        return stmt.on_conflict_do_update(
+            index_elements=[ConversationSummary.conversation_id],
+            set_={
+                "total_messages": ConversationSummary.total_messages + stmt.excluded.total_messages,
+                "sum_msg_len": ConversationSummary.sum_msg_len + stmt.excluded.sum_msg_len,
+                "sum_resp_len": ConversationSummary.sum_resp_len + stmt.excluded.sum_resp_len,
+                "end_time": stmt.excluded.end_time
+            }
+        )
+    
     async def get_popular_topics(
         self,
         days: int = 30,
@@ -104,32 +277,93 @@ class AnalyticsService(LoggerMixin):
         Returns:
             List of popular topics with counts
         """
+        return await self._cached(
+            f"popular_topics:{days}:{limit}",
+            lambda: self._compute_popular_topics(days, limit)
+        )
+    
+    async def _compute_popular_topics(self, days: int, limit: int) -> List[Dict[str, Any]]:
+        """Count topics over the last `days` days in SQL."""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # Filter interactions by date
-        recent_interactions = [
-            interaction for interaction in self.interactions
-            if interaction["timestamp"] >= cutoff_date
-        ]
-        
-        # Count topics
-        topic_counts = {}
-        for interaction in recent_interactions:
-            topic = interaction["topic"]
-            topic_counts[topic] = topic_counts.get(topic, 0) + 1
-        
-        # Sort by count and return top topics
-        sorted_topics = sorted(
-            topic_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
+        async with db_manager.async_session() as session:
+            return await self._top_topics(session, cutoff_date, limit)
+    
+    @staticmethod
+    async def _top_topics(
+        session: AsyncSession,
+        cutoff_date: datetime,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Count interactions per topic since cutoff_date, most frequent first."""
+        count = func.count().label("count")
+        result = await session.execute(
+            select(Interaction.topic, count)
+            .where(Interaction.timestamp >= cutoff_date)
+            .group_by(Interaction.topic)
+            .order_by(desc(count))
+            .limit(limit)
+        )
         
         return [
-            {"topic": topic, "count": count}
-            for topic, count in sorted_topics
+            {"topic": topic, "count": topic_count}
+            for topic, topic_count in result.all()
         ]
     
+    async def _cached(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return a JSON-serializable result from the shared cache, computing it on a miss.
+        
+        Redis errors fall back to computing directly and pause cache use for
+        ANALYTICS_CACHE_RETRY_SECONDS, so an outage adds no per-request timeouts.
+        
+        Args:
+            key: Cache key, without the shared prefix
+            compute: Coroutine function producing the result
+            
+        Returns:
+            Cached or freshly computed result
+        """
+        key = ANALYTICS_CACHE_PREFIX + key
+        use_cache = monotonic() >= self.cache_retry_at
+        
+        if use_cache:
+            try:
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    return orjson.loads(cached)
+            except (RedisError, OSError) as e:
+                self._pause_cache(e)
+                use_cache = False
+        
+        result = await compute()
+        
+        if use_cache:
+            try:
+                await self.cache.set(key, orjson.dumps(result), ex=ANALYTICS_CACHE_TTL_SECONDS)
+            except (RedisError, OSError) as e:
+                self._pause_cache(e)
+        
+        return result
+    
+    def _pause_cache(self, error: Exception) -> None:
+        """Stop using the shared cache for a while after a Redis failure."""
+        self.cache_retry_at = monotonic() + ANALYTICS_CACHE_RETRY_SECONDS
+        self.logger.warning(
+            "Analytics cache unavailable, querying directly",
+            error=str(error),
+            retry_in=ANALYTICS_CACHE_RETRY_SECONDS
+        )
+    
+    async def _invalidate_cache(self) -> None:
+        """Drop every cached aggregate, e.g. after old data is deleted."""
+        try:
+            keys = [key async for key in self.cache.scan_iter(match=ANALYTICS_CACHE_PREFIX + "*")]
+            if keys:
+                await self.cache.delete(*keys)
+        except (RedisError, OSError) as e:
+            self._pause_cache(e)
+    
     async def get_user_analytics(
         self,
         user_id: str
@@ -143,37 +377,49 @@ class AnalyticsService(LoggerMixin):
         Returns:
             User analytics data
         """
-        if user_id not in self.user_sessions:
-            return {"error": "User not found"}
-        
-        session = self.user_sessions[user_id]
-        user_interactions = [
-            interaction for interaction in self.interactions
-            if interaction["user_id"] == user_id
-        ]
-        
-        # Calculate user statistics
-        total_messages = len(user_interactions)
-        avg_message_length = sum(
-            interaction["message_length"] for interaction in user_interactions
-        ) / total_messages if total_messages > 0 else 0
-        
-        # Get user's topic preferences
-        user_topic_counts = {}
-        for interaction in user_interactions:
-            topic = interaction["topic"]
-            user_topic_counts[topic] = user_topic_counts.get(topic, 0) + 1
+        async with db_manager.async_session() as session:
+            # Only the columns reported below; no ORM entity is built
+            result = await session.execute(
+                select(User.created_at, User.last_seen, User.total_interactions)
+                .where(User.id == user_id)
+            )
+            user = result.first()
+            if user is None:
+                return {"error": "User not found"}
+            
+            # Per-topic counts and length totals in one grouped pass over
+            # the user's rows
+            result = await session.execute(
+                select(
+                    Interaction.topic,
+                    func.count(),
+                    func.coalesce(func.sum(Interaction.message_length), 0)
+                )
+                .where(Interaction.user_id == user_id)
+                .group_by(Interaction.topic)
+            )
+            topic_rows = result.all()
+        
+        user_topic_counts = {topic: topic_count for topic, topic_count, _ in topic_rows}
+        total_messages = sum(user_topic_counts.values())
+        total_length = sum(length for _, _, length in topic_rows)
+        avg_message_length = total_length / total_messages if total_messages > 0 else 0
+        
+        first_seen = user.created_at
+        last_seen = user.last_seen or first_seen
         
         return {
             "user_id": user_id,
-            "first_seen": session["first_seen"],
-            "last_seen": session["last_seen"],
-            "total_interactions": session["total_interactions"],
+            "first_seen": first_seen,
+            "last_seen": last_seen,
+            "total_interactions": user.total_interactions or 0,
             "total_messages": total_messages,
             "avg_message_length": round(avg_message_length, 2),
-            "topics": list(session["topics"]),
+            "topics": list(user_topic_counts),
             "topic_preferences": user_topic_counts,
-            "session_duration": (session["last_seen"] - session["first_seen"]).total_seconds()
+            "session_duration": (
+                (last_seen - first_seen).total_seconds() if first_seen else 0
+            )
         }
     
     async def get_overall_statistics(
@@ -189,56 +435,51 @@ class AnalyticsService(LoggerMixin):
         Returns:
             Overall statistics
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Filter interactions by date
-        recent_interactions = [
-            interaction for interaction in self.interactions
-            if interaction["timestamp"] >= cutoff_date
-        ]
-        
-        if not recent_interactions:
-            return {
-                "total_interactions": 0,
-                "unique_users": 0,
-                "avg_message_length": 0,
-                "top_topics": [],
-                "period_days": days
-            }
-        
-        # Calculate statistics
-        total_interactions = len(recent_interactions)
-        unique_users = len(set(
-            interaction["user_id"] for interaction in recent_interactions
-        ))
+        statistics = await self._cached(
+            f"overall_statistics:{days}",
+            lambda: self._compute_overall_statistics(days)
+        )
         
-        avg_message_length = sum(
-            interaction["message_length"] for interaction in recent_interactions
-        ) / total_interactions
+        if not statistics["total_interactions"]:
+            return {**statistics, "period_days": days}
         
-        # Get top topics
-        topic_counts = {}
-        for interaction in recent_interactions:
-            topic = interaction["topic"]
-            topic_counts[topic] = topic_counts.get(topic, 0) + 1
+        period_end = datetime.utcnow()
+        return {
+            **statistics,
+            "period_days": days,
+            "period_start": period_end - timedelta(days=days),
+            "period_end": period_end
+        }
+    
+    async def _compute_overall_statistics(self, days: int) -> Dict[str, Any]:
+        """Aggregate totals, users and top topics over the last `days` days in SQL."""
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        top_topics = sorted(
-            topic_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        async with db_manager.async_session() as session:
+            result = await session.execute(
+                select(
+                    func.count(),
+                    func.count(distinct(Interaction.user_id)),
+                    func.avg(Interaction.message_length)
+                ).where(Interaction.timestamp >= cutoff_date)
+            )
+            total_interactions, unique_users, avg_message_length = result.one()
+            
+            if not total_interactions:
+                return {
+                    "total_interactions": 0,
+                    "unique_users": 0,
+                    "avg_message_length": 0,
+                    "top_topics": []
+                }
+            
+            top_topics = await self._top_topics(session, cutoff_date, 5)
         
         return {
             "total_interactions": total_interactions,
             "unique_users": unique_users,
-            "avg_message_length": round(avg_message_length, 2),
-            "top_topics": [
-                {"topic": topic, "count": count}
-                for topic, count in top_topics
-            ],
-            "period_days": days,
-            "period_start": cutoff_date,
-            "period_end": datetime.utcnow()
+            "avg_message_length": round(float(avg_message_length or 0), 2),
+            "top_topics": top_topics
         }
     
     async def get_conversation_analytics(
@@ -254,45 +495,39 @@ class AnalyticsService(LoggerMixin):
         Returns:
             Conversation analytics data
         """
-        conversation_interactions = [
-            interaction for interaction in self.interactions
-            if interaction["conversation_id"] == conversation_id
-        ]
-        
-        if not conversation_interactions:
-            return {"error": "Conversation not found"}
-        
-        # Calculate conversation statistics
-        total_messages = len(conversation_interactions)
-        user_id = conversation_interactions[0]["user_id"]
-        
-        # Get conversation topics
-        topics = list(set(
-            interaction["topic"] for interaction in conversation_interactions
-        ))
-        
-        # Calculate average message and response lengths
-        avg_message_length = sum(
-            interaction["message_length"] for interaction in conversation_interactions
-        ) / total_messages
+        async with db_manager.async_session() as session:
+            result = await session.execute(
+                select(
+                    ConversationSummary.user_id,
+                    ConversationSummary.total_messages,
+                    ConversationSummary.sum_msg_len,
+                    ConversationSummary.sum_resp_len,
+                    ConversationSummary.start_time,
+                    ConversationSummary.end_time
+                ).where(ConversationSummary.conversation_id == conversation_id)
+            )
+            summary = result.first()
+            if summary is None:
+                return {"error": "Conversation not found"}
+            
+            result = await session.execute(
+                select(distinct(Interaction.topic))
+                .where(Interaction.conversation_id == conversation_id)
+            )
+            topics = list(result.scalars())
         
-        avg_response_length = sum(
-            interaction["response_length"] for interaction in conversation_interactions
-        ) / total_messages
+        total_messages = summary.total_messages
         
         return {
             "conversation_id": conversation_id,
-            "user_id": user_id,
+            "user_id": summary.user_id,
             "total_messages": total_messages,
             "topics": topics,
-            "avg_message_length": round(avg_message_length, 2),
-            "avg_response_length": round(avg_response_length, 2),
-            "start_time": conversation_interactions[0]["timestamp"],
-            "end_time": conversation_interactions[-1]["timestamp"],
-            "duration_seconds": (
-                conversation_interactions[-1]["timestamp"] - 
-                conversation_interactions[0]["timestamp"]
-            ).total_seconds()
+            "avg_message_length": round(summary.sum_msg_len / total_messages, 2),
+            "avg_response_length": round(summary.sum_resp_len / total_messages, 2),
+            "start_time": summary.start_time,
+            "end_time": summary.end_time,
+            "duration_seconds": (summary.end_time - summary.start_time).total_seconds()
         }
     
     async def cleanup_old_data(self, days: int = 90) -> None:
@@ -304,24 +539,25 @@ class AnalyticsService(LoggerMixin):
         """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # Remove old interactions
-        self.interactions = [
-            interaction for interaction in self.interactions
-            if interaction["timestamp"] >= cutoff_date
-        ]
-        
-        # Clean up user sessions
-        expired_users = []
-        for user_id, session in self.user_sessions.items():
-            if session["last_seen"] < cutoff_date:
-                expired_users.append(user_id)
+        # Single indexed range delete instead of rebuilding the list
+        async with db_manager.async_session() as session:
+            result = await session.execute(
+                delete(Interaction).where(Interaction.timestamp < cutoff_date)
+            )
+            await session.execute(
+                delete(ConversationSummary).where(ConversationSummary.end_time < cutoff_date)
+            )
         
-        for user_id in expired_users:
-            del self.user_sessions[user_id]
+        await self._invalidate_cache()
         
         self.logger.info(
             "Cleaned up old analytics data",
             cutoff_date=cutoff_date,
-            remaining_interactions=len(self.interactions),
-            remaining_users=len(self.user_sessions)
-        ) 
\ No newline at end of file
+            deleted_interactions=result.rowcount
+        )
+
+
+@lru_cache(maxsize=1)
+def get_analytics_service() -> AnalyticsService:
+    """Return the shared analytics service, creating it on first use."""
+    return AnalyticsService()
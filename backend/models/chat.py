@@ -2,16 +2,71 @@
 Chat bot model for the Sleep Science Explainer Bot.
 """
 
-import uuid
+import asyncio
+from contextlib import AsyncExitStack
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import boto3
-import json
+from typing import Dict, Final, List, Optional, Any
+import aioboto3
+import orjson
+import redis.asyncio as redis
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+from backend.core.ids import new_id
 from backend.core.logging import LoggerMixin
 from backend.core.config import settings
 
+# Shared Bedrock HTTP pool; sized above boto's default of 10 so concurrent
+# chats don't queue for a connection
+BEDROCK_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    retries={"max_attempts": 2, "mode": "adaptive"}
+)
+
+# Conversations expire from Redis after a day without new messages
+CONVERSATION_TTL_SECONDS = 86400
+
+# History sent to the model: the newest messages that fit the token
+# budget, looking back at most CONTEXT_MAX_MESSAGES
+CONTEXT_TOKEN_BUDGET = 6000
+CONTEXT_MAX_MESSAGES = 50
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+
+# System prompt for sleep science expertise
+SYSTEM_PROMPT: Final[str] = (
+    "You are the Sleep Science Explainer Bot. Your goal is to interpret, summarize, and explain "
+    "sleep-related academic papers and guidelines in a clear, accessible way. Prioritize accuracy, "
+    "cite sources where possible, and present information without jargon. "
+    "Provide a 1-sentence executive summary at the top of each answer. "
+    "Remember: You are an educational tool, not a replacement for professional medical advice."
+)
+
+# Marked as a cacheable prefix when prompt caching is enabled, so the
+# provider can reuse it across requests
+BEDROCK_SYSTEM = (
+    [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+    if settings.bedrock_prompt_caching
+    else SYSTEM_PROMPT
+)
+
+# Everything in the Bedrock request except the messages is fixed, so it
+# is serialized once (minus the closing brace) and the messages are
+# spliced in per request
+BEDROCK_BODY_PREFIX: Final[bytes] = orjson.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": settings.bedrock_max_tokens,
+    "temperature": settings.bedrock_temperature,
+    "system": BEDROCK_SYSTEM
+})[:-1]
+BEDROCK_MESSAGES_KEY: Final[bytes] = b',"messages":'
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap upper-bound token estimate, without a model-specific tokenizer."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
 
 class ChatBot(LoggerMixin):
     """
@@ -28,57 +83,62 @@ class ChatBot(LoggerMixin):
         """Initialize the chat bot with AWS Bedrock client."""
         self.logger.info("Initializing ChatBot")
         
-        # Initialize AWS Bedrock client
-        self.bedrock_client = boto3.client(
-            'bedrock-runtime',
+        # AWS Bedrock client, opened on first use and kept for the process
+        # lifetime so its connection pool is reused across requests
+        self.bedrock_session = aioboto3.Session(
             region_name=settings.aws_bedrock_region,
             aws_access_key_id=settings.aws_access_key_id,
             aws_secret_access_key=settings.aws_secret_access_key
         )
+        self.bedrock_client = None
+        self._bedrock_lock = asyncio.Lock()
+        self._exit_stack = AsyncExitStack()
         
-        # Conversation storage (in production, this would be in a database)
-        self.conversations: Dict[str, Dict[str, Any]] = {}
-        
-        # System prompt for sleep science expertise
-        self.system_prompt = (
-            "You are the Sleep Science Explainer Bot. Your goal is to interpret, summarize, and explain "
-            "sleep-related academic papers and guidelines in a clear, accessible way. Prioritize accuracy, "
-            "cite sources where possible, and present information without jargon. "
-            "Provide a 1-sentence executive summary at the top of each answer. "
-            "Remember: You are an educational tool, not a replacement for professional medical advice."
-        )
+        # Conversation storage shared by all workers: messages in a Redis
+        # list, created/updated times in a hash, both expiring together
+        self.kv = redis.from_url(settings.redis_url, password=settings.redis_password)
         
         self.logger.info("ChatBot initialized successfully")
     
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for the sleep science bot."""
-        return """You are a Sleep Science Explainer Bot, an AI assistant specialized in explaining sleep-related research, medical guidelines, and health information in simple, accessible terms.
-
-Your expertise includes:
-- Sleep cycles and circadian rhythms
-- Sleep disorders (insomnia, sleep apnea, etc.)
-- Sleep hygiene and best practices
-- Sleep research and scientific studies
-- Sleep medicine and treatments
-- Sleep and overall health relationships
-
-Guidelines:
-1. Always provide evidence-based information from reputable sources
-2. Explain complex medical concepts in simple, layperson-friendly language
-3. Be accurate and avoid making medical diagnoses
-4. Encourage users to consult healthcare professionals for medical advice
-5. Cite sources when referencing specific research or guidelines
-6. Be empathetic and supportive
-7. Focus on education and understanding rather than medical advice
-
-When discussing research papers or studies:
-- Summarize key findings clearly
-- Explain the significance and implications
-- Note any limitations or caveats
-- Provide context about the research quality
-
-Remember: You are an educational tool, not a replacement for professional medical advice."""
-
+    async def _get_bedrock_client(self):
+        """Return the shared async Bedrock client, opening it on first use."""
+        if self.bedrock_client is None:
+            async with self._bedrock_lock:
+                if self.bedrock_client is None:
+                    self.bedrock_client = await self._exit_stack.enter_async_context(
+                        self.bedrock_session.client(
+                            "bedrock-runtime",
+                            config=BEDROCK_CLIENT_CONFIG
+                        )
+                    )
+        return self.bedrock_client
+    
+    async def aclose(self) -> None:
+        """Close the Bedrock client and the conversation store connections."""
+        await self._exit_stack.aclose()
+        self.bedrock_client = None
+        await self.kv.aclose()
+    
+    @staticmethod
+    def _messages_key(conversation_id: str) -> str:
+        """Redis key of a conversation's message list."""
+        return f"conv:{conversation_id}:messages"
+    
+    @staticmethod
+    def _meta_key(conversation_id: str) -> str:
+        """Redis key of a conversation's metadata hash."""
+        return f"conv:{conversation_id}:meta"
+    
+    async def _get_messages(
+        self,
+        conversation_id: str,
+        start: int = 0,
+        end: int = -1
+    ) -> List[Dict[str, Any]]:
+        """Return a range of a conversation's messages, oldest first."""
+        raw_messages = await self.kv.lrange(self._messages_key(conversation_id), start, end)
+        return [orjson.loads(raw_message) for raw_message in raw_messages]
+    
     async def generate_response(
         self,
         message: str,
@@ -103,17 +163,12 @@ Remember: You are an educational tool, not a replacement for professional medica
         )
         
         try:
-            # Create or get conversation
+            # Create or get conversation; it is stored with its first message
             if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-                self.conversations[conversation_id] = {
-                    "messages": [],
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                }
+                conversation_id = new_id()
             
             # Add user message to conversation
-            self._add_message_to_conversation(
+            await self._add_message_to_conversation(
                 conversation_id, "user", message
             )
             
@@ -121,7 +176,7 @@ Remember: You are an educational tool, not a replacement for professional medica
             ai_response = await self._generate_ai_response(conversation_id)
             
             # Add AI response to conversation
-            self._add_message_to_conversation(
+            await self._add_message_to_conversation(
                 conversation_id, "assistant", ai_response["content"]
             )
             
@@ -151,41 +206,55 @@ Remember: You are an educational tool, not a replacement for professional medica
             Dictionary containing AI response data
         """
         try:
-            # Get the message history for the conversation
-            messages = self.conversations.get(conversation_id, {}).get("messages", [])
+            # Get the recent message history for the conversation
+            messages = await self._get_messages(conversation_id, -CONTEXT_MAX_MESSAGES, -1)
 
-            # Format messages for the Anthropic Claude 3 model
+            # Format messages for the Anthropic Claude 3 model, newest first,
+            # until the token budget is spent
             formatted_messages = []
-            for msg in messages:
+            tokens_left = CONTEXT_TOKEN_BUDGET
+            for msg in reversed(messages):
                 # Skip system messages if they are accidentally stored
-                if msg["role"] != "system":
-                    formatted_messages.append({"role": msg["role"], "content": [{"type": "text", "text": msg["content"]}]})
+                if msg["role"] == "system":
+                    continue
+                tokens_left -= msg.get("tokens") or _estimate_tokens(msg["content"])
+                # Always keep the newest message, even if it alone is over budget
+                if tokens_left < 0 and formatted_messages:
+                    break
+                formatted_messages.append({"role": msg["role"], "content": [{"type": "text", "text": msg["content"]}]})
+            formatted_messages.reverse()
+
+            # The conversation sent must open with a user turn
+            while formatted_messages and formatted_messages[0]["role"] != "user":
+                formatted_messages.pop(0)
 
             # Prepare the request body for Bedrock
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": settings.bedrock_max_tokens,
-                "temperature": settings.bedrock_temperature,
-                "system": self.system_prompt,
-                "messages": formatted_messages,
-            }
+            body = b"".join((
+                BEDROCK_BODY_PREFIX,
+                BEDROCK_MESSAGES_KEY,
+                orjson.dumps(formatted_messages),
+                b"}"
+            ))
 
-            # Call Bedrock API
-            response = self.bedrock_client.invoke_model(
+            # Call Bedrock API without blocking the event loop
+            bedrock_client = await self._get_bedrock_client()
+            response = await bedrock_client.invoke_model(
                 modelId=settings.bedrock_model_id,
-                body=json.dumps(body),
+                body=body,
                 contentType="application/json",
                 accept="application/json"
             )
             
             # Parse response
-            response_body = json.loads(response.get("body").read())
+            response_body = orjson.loads(await response["body"].read())
             
-            # Extract the response text
-            response_text = ""
-            for block in response_body.get("content", []):
-                if block.get("type") == "text":
-                    response_text += block.get("text", "")
+            # Extract the response text in one join rather than repeated
+            # string concatenation
+            response_text = "".join(
+                block.get("text", "")
+                for block in response_body.get("content", [])
+                if block.get("type") == "text"
+            )
 
             return {
                 "content": response_text,
@@ -200,7 +269,7 @@ Remember: You are an educational tool, not a replacement for professional medica
             self.logger.error(f"Error in _generate_ai_response: {e}")
             raise
     
-    def _prepare_conversation_context(
+    async def _prepare_conversation_context(
         self,
         conversation_id: str,
         additional_context: Optional[Dict[str, Any]] = None
@@ -215,8 +284,8 @@ Remember: You are an educational tool, not a replacement for professional medica
         Returns:
             Formatted conversation context string
         """
-        conversation = self.conversations.get(conversation_id, {})
-        messages = conversation.get("messages", [])
+        # Only the last 10 messages are used for context; fetch just those
+        messages = await self._get_messages(conversation_id, -10, -1)
         
         # Format conversation history
         context_parts = []
@@ -226,14 +295,14 @@ Remember: You are an educational tool, not a replacement for professional medica
             context_parts.append(f"Additional context: {additional_context}")
         
         # Add conversation history
-        for msg in messages[-10:]:  # Last 10 messages for context
+        for msg in messages:
             role = msg["role"]
             content = msg["content"]
             context_parts.append(f"{role}: {content}")
         
         return "\n".join(context_parts)
     
-    def _add_message_to_conversation(
+    async def _add_message_to_conversation(
         self,
         conversation_id: str,
         role: str,
@@ -247,21 +316,25 @@ Remember: You are an educational tool, not a replacement for professional medica
             role: Message role (user/assistant)
             content: Message content
         """
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = {
-                "messages": [],
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-        
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow()
-        }
+        now = datetime.utcnow().isoformat()
+        messages_key = self._messages_key(conversation_id)
+        meta_key = self._meta_key(conversation_id)
         
-        self.conversations[conversation_id]["messages"].append(message)
-        self.conversations[conversation_id]["updated_at"] = datetime.utcnow()
+        # One round trip; both keys get a fresh TTL on every message
+        async with self.kv.pipeline(transaction=True) as pipe:
+            pipe.rpush(messages_key, orjson.dumps({
+                "role": role,
+                "content": content,
+                "timestamp": now,
+                # Counted once here rather than on every request that
+                # reads this message back
+                "tokens": _estimate_tokens(content)
+            }))
+            pipe.hsetnx(meta_key, "created_at", now)
+            pipe.hset(meta_key, "updated_at", now)
+            pipe.expire(messages_key, CONVERSATION_TTL_SECONDS)
+            pipe.expire(meta_key, CONVERSATION_TTL_SECONDS)
+            await pipe.execute()
     
     async def get_conversation_history(self, conversation_id: str) -> Dict[str, Any]:
         """
@@ -273,10 +346,16 @@ Remember: You are an educational tool, not a replacement for professional medica
         Returns:
             Conversation history data
         """
-        if conversation_id not in self.conversations:
+        meta = await self.kv.hgetall(self._meta_key(conversation_id))
+        if not meta:
             raise ValueError("Conversation not found")
         
-        return self.conversations[conversation_id]
+        return {
+            "conversation_id": conversation_id,
+            "messages": await self._get_messages(conversation_id),
+            "created_at": meta[b"created_at"].decode(),
+            "updated_at": meta[b"updated_at"].decode()
+        }
     
     async def delete_conversation(self, conversation_id: str) -> None:
         """
@@ -285,8 +364,11 @@ Remember: You are an educational tool, not a replacement for professional medica
         Args:
             conversation_id: The conversation ID
         """
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
-            self.logger.info(f"Deleted conversation: {conversation_id}")
-        else:
-            raise ValueError("Conversation not found") 
\ No newline at end of file
+        deleted = await self.kv.delete(
+            self._messages_key(conversation_id),
+            self._meta_key(conversation_id)
+        )
+        if not deleted:
+            raise ValueError("Conversation not found")
+        
+        self.logger.info(f"Deleted conversation: {conversation_id}") 
\ No newline at end of file
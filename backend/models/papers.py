@@ -4,7 +4,7 @@ Pydantic models for research papers.
 
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class ResearchPaper(BaseModel):
@@ -20,5 +20,9 @@ class ResearchPaper(BaseModel):
     doi: Optional[str] = None
     citation_count: Optional[int] = None
 
-    class Config:
-        orm_mode = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Serializes papers straight to JSON bytes in pydantic-core, with no
+# intermediate dict or str
+RESEARCH_PAPER_ADAPTER = TypeAdapter(ResearchPaper)
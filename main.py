@@ -5,51 +5,150 @@ This script provides a unified interface to start the application.
 """
 
 import os
+import socket
 import sys
 import subprocess
 import time
 import signal
-import threading
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Optional
 
-def print_banner():
-    """Print application banner."""
-    print("""
+# Interpreter facts, fixed for the life of the process
+_PY_OK = sys.version_info >= (3, 9)
+_IN_VENV = hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix)
+
+# Filesystem locations the checks look at, relative to the project root
+FRONTEND_DIR = Path("frontend")
+NODE_MODULES = FRONTEND_DIR / "node_modules"
+ENV_FILE = Path(".env")
+# Variables check_environment requires to be set
+REQUIRED_ENV_VARS = frozenset({"DATABASE_URL", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"})
+REQUIREMENTS_FILE = Path("requirements.txt")
+# Records the interpreter and requirements.txt mtime of the last passing
+# backend check
+DEPS_STAMP = Path(".deps_ok")
+
+# How often start_both checks whether either server has exited, in seconds
+PROCESS_POLL_INTERVAL = 0.2
+
+# Backend readiness probe: poll interval and give-up time, in seconds
+BACKEND_POLL_INTERVAL = 0.05
+BACKEND_READY_TIMEOUT = 5.0
+
+# CLI text, written in one call each
+_BANNER = """
 🌙 Sleep Science Explainer Bot
 ================================
 A conversational AI for sleep science research
-    """)
+    
+"""
+_HELP = """
+Usage: python main.py [command]
 
-def check_dependencies():
-    """Check if required dependencies are installed."""
-    print("🔍 Checking dependencies...")
+Commands:
+  start       Start the backend server only
+  frontend    Start the frontend server only
+  both        Start both backend and frontend servers
+  test        Run the test suite
+  coverage    Generate test coverage report
+  check       Check dependencies and environment
+  help        Show this help message
+
+Examples:
+  python main.py both        # Start both servers
+  python main.py test        # Run tests
+  python main.py coverage    # Generate coverage report
+    
+"""
+# Pre-encoded, so writing them skips the text layer
+_BANNER_BYTES = _BANNER.encode("utf-8")
+_HELP_BYTES = _HELP.encode("utf-8")
+
+def _write_bytes(data: bytes):
+    """Write pre-encoded UTF-8 text straight to stdout's binary buffer."""
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # stdout replaced by a text-only stream
+        sys.stdout.write(data.decode("utf-8"))
+        return
+    # Anything already printed must come out first
+    sys.stdout.flush()
+    buffer.write(data)
+
+def print_banner():
+    """Print application banner."""
+    _write_bytes(_BANNER_BYTES)
+
+# Packages the backend needs; only located, never imported, by the check
+BACKEND_PACKAGES = ("fastapi", "uvicorn", "sqlalchemy")
+
+@lru_cache(maxsize=1)
+def check_backend_deps():
+    """Check that Python and the backend packages are available."""
+    print("🔍 Checking backend dependencies...")
     
     # Check Python version
-    if sys.version_info < (3, 9):
+    if not _PY_OK:
         print("❌ Python 3.9+ is required")
         return False
     
     # Check if virtual environment is activated
-    if not hasattr(sys, 'real_prefix') and not (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
+    if not _IN_VENV:
         print("⚠️  Virtual environment not detected. Consider activating one.")
     
-    # Check if requirements are installed
-    try:
-        import fastapi
-        import uvicorn
-        import sqlalchemy
+    # A stamp matching this interpreter and the current requirements.txt
+    # means the packages were already found, so the probe can be skipped
+    requirements_version = _requirements_version()
+    if requirements_version is not None and _read_stamp() == requirements_version:
         print("✅ Backend dependencies found")
-    except ImportError as e:
-        print(f"❌ Missing backend dependency: {e}")
+        return True
+    
+    # Check if requirements are installed, without importing them
+    missing = [name for name in BACKEND_PACKAGES if find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing backend dependency: {', '.join(missing)}")
         print("Run: pip install -r requirements.txt")
         return False
     
-    # Check if frontend dependencies are installed
-    frontend_path = Path("frontend")
-    if frontend_path.exists():
-        node_modules = frontend_path / "node_modules"
-        if not node_modules.exists():
+    if requirements_version is not None:
+        try:
+            DEPS_STAMP.write_text(requirements_version)
+        except OSError:
+            pass
+    
+    print("✅ Backend dependencies found")
+    return True
+
+def _requirements_version() -> Optional[str]:
+    """
+    Return the stamp value for this interpreter and requirements.txt.
+    
+    The interpreter path and prefix are included so switching Python or
+    virtual environment invalidates the stamp. None if requirements.txt
+    doesn't exist.
+    """
+    try:
+        mtime = os.stat(REQUIREMENTS_FILE).st_mtime_ns
+    except OSError:
+        return None
+    return f"{sys.executable}\n{sys.prefix}\n{mtime}"
+
+def _read_stamp() -> Optional[str]:
+    """Return the contents of the dependency stamp, if one was written."""
+    try:
+        return DEPS_STAMP.read_text()
+    except OSError:
+        return None
+
+@lru_cache(maxsize=1)
+def check_frontend_deps():
+    """Check that the frontend dependencies are installed."""
+    print("🔍 Checking frontend dependencies...")
+    
+    if _exists(FRONTEND_DIR):
+        if not _exists(NODE_MODULES):
             print("⚠️  Frontend dependencies not found")
             print("Run: cd frontend && npm install")
             return False
@@ -58,31 +157,38 @@ def check_dependencies():
     
     return True
 
+@lru_cache(maxsize=1)
+def check_dependencies():
+    """Check backend and frontend dependencies."""
+    backend_ok = check_backend_deps()
+    frontend_ok = check_frontend_deps()
+    return backend_ok and frontend_ok
+
+@lru_cache(maxsize=None)
+def _exists(path: Path) -> bool:
+    """Stat a path once per invocation."""
+    try:
+        os.stat(path)
+    except OSError:
+        return False
+    return True
+
 def check_environment():
     """Check if environment is properly configured."""
     print("🔧 Checking environment configuration...")
     
-    env_file = Path(".env")
-    if not env_file.exists():
+    if not _exists(ENV_FILE):
         print("⚠️  .env file not found")
         print("Run: cp env.example .env")
         print("Then edit .env with your configuration")
         return False
     
-    # Check for required environment variables
-    required_vars = [
-        "DATABASE_URL",
-        "AWS_ACCESS_KEY_ID", 
-        "AWS_SECRET_ACCESS_KEY"
-    ]
-    
-    missing_vars = []
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
+    # Check for required environment variables. Set-but-empty counts as
+    # configured; settings validation owns the values
+    missing_vars = REQUIRED_ENV_VARS - os.environ.keys()
     
     if missing_vars:
-        print(f"⚠️  Missing environment variables: {', '.join(missing_vars)}")
+        print(f"⚠️  Missing environment variables: {', '.join(sorted(missing_vars))}")
         print("Please configure these in your .env file")
         return False
     
@@ -90,96 +196,167 @@ def check_environment():
     return True
 
 def start_backend():
-    """Start the FastAPI backend server."""
+    """Start the FastAPI backend server in this interpreter."""
     print("🚀 Starting backend server...")
     try:
-        subprocess.run([sys.executable, "app.py"], check=True)
-    except subprocess.CalledProcessError as e:
+        # Served in-process rather than through a second interpreter, so
+        # the already-imported packages aren't loaded again. uvicorn
+        # handles SIGINT/SIGTERM itself and shuts down gracefully.
+        from app import run_server
+        run_server()
+    except Exception as e:
         print(f"❌ Backend failed to start: {e}")
         return False
     except KeyboardInterrupt:
         print("\n🛑 Backend stopped by user")
-        return True
+    return True
 
 def start_frontend():
-    """Start the React frontend development server."""
+    """
+    Start the React frontend development server.
+    
+    npm takes over this process via exec, so no Python interpreter stays
+    resident just to wait on it.
+    """
     print("🎨 Starting frontend server...")
+    if not _exists(FRONTEND_DIR):
+        print("❌ Frontend directory not found")
+        return False
+    
+    os.chdir(FRONTEND_DIR)
+    # exec discards anything still buffered
+    sys.stdout.flush()
     try:
-        frontend_dir = Path("frontend")
-        if not frontend_dir.exists():
-            print("❌ Frontend directory not found")
-            return False
-        
-        os.chdir(frontend_dir)
-        subprocess.run(["npm", "start"], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Frontend failed to start: {e}")
+        os.execvp("npm", ["npm", "start"])
+    except FileNotFoundError:
+        print("❌ npm not found. Install Node.js to run the frontend.")
         return False
-    except KeyboardInterrupt:
-        print("\n🛑 Frontend stopped by user")
-        return True
+
+def wait_for_backend():
+    """Poll the backend port until it accepts a connection or the timeout expires."""
+    # Same source as the backend, so a port set only in .env is honoured
+    from backend.core.config import settings
+    port = settings.api_port
+    deadline = time.monotonic() + BACKEND_READY_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=BACKEND_POLL_INTERVAL):
+                return True
+        except OSError:
+            time.sleep(BACKEND_POLL_INTERVAL)
+    return False
 
 def start_both():
-    """Start both backend and frontend servers."""
+    """
+    Start both backend and frontend servers.
+    
+    Each server runs as its own child process, so the backend keeps its
+    workers and signal handling. When either one exits, or on Ctrl+C,
+    the other is terminated too.
+    """
     print("🚀 Starting both backend and frontend servers...")
     
-    # Start backend in a separate thread
-    backend_thread = threading.Thread(target=start_backend, daemon=True)
-    backend_thread.start()
+    backend = subprocess.Popen([sys.executable, "app.py"])
     
-    # Wait a moment for backend to start
-    time.sleep(3)
+    # Wait until the backend accepts connections
+    if not wait_for_backend():
+        print("⚠️  Backend not reachable yet, starting frontend anyway")
     
-    # Start frontend
-    start_frontend()
+    print("🎨 Starting frontend server...")
+    try:
+        frontend = subprocess.Popen(["npm", "start"], cwd=FRONTEND_DIR)
+    except FileNotFoundError:
+        print("❌ npm not found. Install Node.js to run the frontend.")
+        backend.terminate()
+        backend.wait()
+        return False
+    
+    processes = (backend, frontend)
+    
+    def stop_all(*_):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+    
+    previous_handler = signal.signal(signal.SIGINT, stop_all)
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(PROCESS_POLL_INTERVAL)
+    finally:
+        stop_all()
+        for process in processes:
+            process.wait()
+        signal.signal(signal.SIGINT, previous_handler)
+    
+    print("\n🛑 Servers stopped")
+    return True
 
 def run_tests():
     """Run the test suite."""
     print("🧪 Running tests...")
+    # Run pytest in this interpreter rather than a fresh one
     try:
-        result = subprocess.run([
-            sys.executable, "-m", "pytest", "tests/", "-v"
-        ], check=True)
-        print("✅ All tests passed!")
-        return True
-    except subprocess.CalledProcessError:
+        import pytest
+    except ImportError:
+        print("❌ pytest is not installed")
+        print("Run: pip install pytest")
+        return False
+    if pytest.main(["tests/", "-v"]) != 0:
         print("❌ Some tests failed")
         return False
+    print("✅ All tests passed!")
+    return True
 
 def generate_coverage():
     """Generate test coverage report."""
     print("📊 Generating coverage report...")
     try:
-        subprocess.run([
-            sys.executable, "-m", "pytest", "tests/", 
-            "--cov=backend", "--cov-report=html", "--cov-report=term"
-        ], check=True)
-        print("✅ Coverage report generated!")
-        print("📁 View report at: htmlcov/index.html")
-        return True
-    except subprocess.CalledProcessError:
+        import coverage
+        import pytest
+    except ImportError as e:
+        print(f"❌ {e.name} is not installed")
+        print(f"Run: pip install {e.name}")
+        return False
+    
+    # Started before pytest imports the backend, so module-level code
+    # is measured too
+    cov = coverage.Coverage(source=["backend"])
+    cov.start()
+    try:
+        exit_code = pytest.main(["tests/"])
+    finally:
+        cov.stop()
+        cov.save()
+    
+    if exit_code != 0:
         print("❌ Coverage generation failed")
         return False
+    
+    cov.report()
+    cov.html_report()
+    print("✅ Coverage report generated!")
+    print("📁 View report at: htmlcov/index.html")
+    return True
 
 def show_help():
     """Show help information."""
-    print("""
-Usage: python main.py [command]
+    _write_bytes(_HELP_BYTES)
 
-Commands:
-  start       Start the backend server only
-  frontend    Start the frontend server only
-  both        Start both backend and frontend servers
-  test        Run the test suite
-  coverage    Generate test coverage report
-  check       Check dependencies and environment
-  help        Show this help message
+def _check_all():
+    """Report on dependencies and environment without starting anything."""
+    check_dependencies()
+    check_environment()
 
-Examples:
-  python main.py both        # Start both servers
-  python main.py test        # Run tests
-  python main.py coverage    # Generate coverage report
-    """)
+# command -> (dependency check or None, requires environment, handler)
+COMMANDS = {
+    "help": (None, False, show_help),
+    "check": (None, False, _check_all),
+    "test": (check_backend_deps, False, run_tests),
+    "coverage": (check_backend_deps, False, generate_coverage),
+    "start": (check_backend_deps, True, start_backend),
+    "frontend": (check_frontend_deps, False, start_frontend),
+    "both": (check_dependencies, True, start_both),
+}
 
 def main():
     """Main entry point."""
@@ -191,29 +368,18 @@ def main():
     
     command = sys.argv[1].lower()
     
-    if command == "help":
-        show_help()
-    elif command == "check":
-        check_dependencies()
-        check_environment()
-    elif command == "test":
-        if check_dependencies():
-            run_tests()
-    elif command == "coverage":
-        if check_dependencies():
-            generate_coverage()
-    elif command == "start":
-        if check_dependencies() and check_environment():
-            start_backend()
-    elif command == "frontend":
-        if check_dependencies():
-            start_frontend()
-    elif command == "both":
-        if check_dependencies() and check_environment():
-            start_both()
-    else:
+    entry = COMMANDS.get(command)
+    if entry is None:
         print(f"❌ Unknown command: {command}")
         show_help()
+        return
+    
+    deps_check, requires_env, handler = entry
+    if deps_check is not None and not deps_check():
+        return
+    if requires_env and not check_environment():
+        return
+    handler()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
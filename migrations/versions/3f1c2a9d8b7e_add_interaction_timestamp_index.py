@@ -0,0 +1,33 @@
+"""add interaction timestamp/conversation index
+
+Revision ID: 3f1c2a9d8b7e
+Revises: 
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d8b7e'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_interactions_timestamp_conversation_id',
+        'interactions',
+        ['timestamp', 'conversation_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_interactions_timestamp_conversation_id', table_name='interactions')
@@ -0,0 +1,68 @@
+"""add conversation summaries
+
+Revision ID: 5a9e3c7d1b24
+Revises: d2b6a4e9c713
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9e3c7d1b24'
+down_revision: Union[str, Sequence[str], None] = 'd2b6a4e9c713'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'conversation_summaries',
+        sa.Column('conversation_id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=True),
+        sa.Column('total_messages', sa.Integer(), nullable=True),
+        sa.Column('sum_msg_len', sa.Integer(), nullable=True),
+        sa.Column('sum_resp_len', sa.Integer(), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('conversation_id'),
+    )
+    op.create_index(
+        op.f('ix_conversation_summaries_end_time'),
+        'conversation_summaries',
+        ['end_time'],
+        unique=False,
+    )
+
+    # Backfill from interactions logged before the table existed
+    op.execute(
+        """
+        INSERT INTO conversation_summaries (
+            conversation_id, user_id, total_messages, sum_msg_len,
+            sum_resp_len, start_time, end_time
+        )
+        SELECT
+            conversation_id,
+            MIN(user_id),
+            COUNT(*),
+            COALESCE(SUM(message_length), 0),
+            COALESCE(SUM(response_length), 0),
+            MIN(timestamp),
+            MAX(timestamp)
+        FROM interactions
+        WHERE conversation_id IS NOT NULL
+        GROUP BY conversation_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_conversation_summaries_end_time'), table_name='conversation_summaries')
+    op.drop_table('conversation_summaries')
@@ -0,0 +1,40 @@
+"""add interaction analytics indexes
+
+Revision ID: 8c4e7b1f2a90
+Revises: 3f1c2a9d8b7e
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e7b1f2a90'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9d8b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_interactions_ts_topic',
+        'interactions',
+        ['timestamp', 'topic'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_interactions_user_ts',
+        'interactions',
+        ['user_id', 'timestamp'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_interactions_user_ts', table_name='interactions')
+    op.drop_index('ix_interactions_ts_topic', table_name='interactions')
@@ -0,0 +1,47 @@
+"""compress interaction message and response text
+
+Revision ID: b7f1d09e6a35
+Revises: 5a9e3c7d1b24
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f1d09e6a35'
+down_revision: Union[str, Sequence[str], None] = '5a9e3c7d1b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite columns accept blobs as they are. Existing rows keep their
+    # plain UTF-8 bytes, which CompressedText still reads.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in ('message', 'response'):
+        op.alter_column(
+            'interactions',
+            column,
+            type_=sa.LargeBinary(),
+            postgresql_using=f"convert_to({column}, 'UTF8')",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Only valid while no compressed rows have been written
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in ('message', 'response'):
+        op.alter_column(
+            'interactions',
+            column,
+            type_=sa.Text(),
+            postgresql_using=f"convert_from({column}, 'UTF8')",
+        )
@@ -0,0 +1,53 @@
+"""index filter and join columns
+
+Revision ID: d2b6a4e9c713
+Revises: 8c4e7b1f2a90
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6a4e9c713'
+down_revision: Union[str, Sequence[str], None] = '8c4e7b1f2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_users_last_seen'), 'users', ['last_seen'], unique=False)
+    op.create_index(op.f('ix_conversations_user_id'), 'conversations', ['user_id'], unique=False)
+    op.create_index(
+        'ix_messages_conversation_id_timestamp',
+        'messages',
+        ['conversation_id', 'timestamp'],
+        unique=False,
+    )
+    op.create_index(
+        op.f('ix_interactions_conversation_id'),
+        'interactions',
+        ['conversation_id'],
+        unique=False,
+    )
+    op.create_index(op.f('ix_interactions_topic'), 'interactions', ['topic'], unique=False)
+    op.create_index(
+        op.f('ix_research_papers_publication_date'),
+        'research_papers',
+        ['publication_date'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_research_papers_publication_date'), table_name='research_papers')
+    op.drop_index(op.f('ix_interactions_topic'), table_name='interactions')
+    op.drop_index(op.f('ix_interactions_conversation_id'), table_name='interactions')
+    op.drop_index('ix_messages_conversation_id_timestamp', table_name='messages')
+    op.drop_index(op.f('ix_conversations_user_id'), table_name='conversations')
+    op.drop_index(op.f('ix_users_last_seen'), table_name='users')
@@ -0,0 +1,18 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@pytest.fixture
+def count_queries():
+    """Collect every SQL statement executed while the test runs."""
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    # Listening on the Engine class covers the sync engine and the one
+    # wrapped by the async engine
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    yield queries
+    event.remove(Engine, "before_cursor_execute", before_cursor_execute)